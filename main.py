@@ -5,18 +5,23 @@ from anthropic import Anthropic
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 import os
-from dynamic_agent.utils.function_schema import create_function_schema, SchemaFormat
+from smart_team.utils import create_function_schema, SchemaFormat
 from smart_team.agents.agent_functions import (
     create_virtualenv,
     install_package,
     execute_code,
     get_weather,
     search_and_fetch_content,
+    load_artifact,
 )
 from smart_team.agents.base_agent import BaseAgent
 from smart_team.agents.anthropic_agent import AnthropicAgent
 from smart_team.agents.openai_agent import OpenAIAgent
 from smart_team.agents.ollama_agent import OllamaAgent
+from smart_team.agents.cascade_agent import CascadeAgent
+from smart_team.graph import AgentGraph, GraphSession, SessionBudget
+from smart_team.session_log import SessionLog
+from smart_team.metrics import REGISTRY
 
 
 def transfer_to_weather(task: str) -> BaseAgent:
@@ -75,9 +80,10 @@ search_bot = OpenAIAgent(
     You are the Search bot. Your role is to:
     1. Get required information using search_and_fetch_content function
     2. For multiple search quries, execute the function multiple times
-    3. After completing the task, return control to orchestrator
+    3. If a truncated page matters and comes with an artifact:// handle, use load_artifact to read more of it
+    4. After completing the task, return control to orchestrator
     """,
-    functions=[search_and_fetch_content, transfer_to_orchestrator],
+    functions=[search_and_fetch_content, load_artifact, transfer_to_orchestrator],
 )
 
 
@@ -104,9 +110,12 @@ code_bot = AnthropicAgent(
 )
 
 # Initialize the orchestrator
-orchestrator = AnthropicAgent(
-    api_key=os.getenv("ANTHROPIC_API_KEY"),
-    model="claude-3-5-sonnet-latest",
+# Most orchestrator turns are simple routing, so try the faster model first
+orchestrator = CascadeAgent(
+    tiers=[
+        {"provider": "anthropic", "model": "claude-3-5-haiku-latest", "api_key": os.getenv("ANTHROPIC_API_KEY")},
+        {"provider": "anthropic", "model": "claude-3-5-sonnet-latest", "api_key": os.getenv("ANTHROPIC_API_KEY")},
+    ],
     is_orchestrator=True,
     name="OrchestratorBot",
     instructions="""
@@ -116,6 +125,7 @@ orchestrator = AnthropicAgent(
         - Use transfer functions as follows:
             - Example: transfer_to_agentx(task = "Get temperature in New York")
     
+        - When a request has independent parts (for example weather and news), call several transfer functions in the same response; those agents run in parallel
     2. When a taks is done by an agent, it will be transfered to you for you to decide which agent to transfer to for the next task
     3. Always summarize what have been done and what errors have been made
     4. When loads of information is retrieved(for example, multiple search results), always make good structure of it using bullet points
@@ -129,136 +139,31 @@ orchestrator = AnthropicAgent(
 
 
 def main():
-    active_agent = orchestrator
-    cross_agent_memories = []
-    while True:
-        messages = []
-        if cross_agent_memories and active_agent.is_ochestrator is True:
-            messages.append(
-                {
-                    "role": "assistant",
-                    "content": f"The following is the hitorical conversation history: {str(cross_agent_memories)}",
-                }
-            )
-        else:
-            messages = []
+    # Set METRICS_PORT to serve Prometheus metrics, METRICS_SNAPSHOT_PATH to dump them periodically
+    if os.getenv("METRICS_PORT"):
+        REGISTRY.start_http_server(int(os.getenv("METRICS_PORT")))
+    if os.getenv("METRICS_SNAPSHOT_PATH"):
+        REGISTRY.start_snapshot_dumps(os.getenv("METRICS_SNAPSHOT_PATH"))
+
+    graph = AgentGraph([orchestrator, weather_bot, search_bot, code_bot])
+    # Set SESSION_LOG_PATH to keep the conversation across restarts, TOOL_PREFETCH=true to prefetch likely tool calls
+    log_path = os.getenv("SESSION_LOG_PATH")
+    log = SessionLog(log_path) if log_path else None
+    session = GraphSession(
+        graph,
+        budget=SessionBudget(max_hops=10, max_tool_calls=30),
+        log=log,
+        prefetch=os.getenv("TOOL_PREFETCH", "false").lower() == "true",
+    )
+    try:
+        while True:
             user_input = input("\nEnter your request (or 'exit' to quit): ")
             if user_input.lower() == "exit":
                 break
-            messages = [
-                {
-                    "role": "user",
-                    "content": (
-                        f"{user_input} + {active_agent.instructions} + The following is the hitorical conversation history(null if none): {str(cross_agent_memories)}"
-                    ).strip(),
-                }
-            ]
-        result = active_agent.send_message(messages)
-        print(result.text)
-        cross_agent_memories.append({"role": "user", "content": user_input})
-        cross_agent_memories.append({"role": "assistant", "content": result.text})
-
-        while result.function_calls:
-            for func_call in result.function_calls:
-                func_name = func_call["name"]
-                func_params = func_call["parameters"]
-                cross_agent_memories.append(
-                    {
-                        "role": "assistant",
-                        "content": f"{active_agent.name} Is Starting Function Call: {func_name}({func_params})",
-                    }
-                )
-                ################# Start Transfer and Execution Logic #################
-                if func_name.startswith("transfer_to_"):
-                    print(f"Transferring to {func_name}!!!")
-                    func = next(
-                        (f for f in active_agent.functions if f.__name__ == func_name),
-                        None,
-                    )
-                    new_agent = func(**func_params)
-                    active_agent = new_agent
-                    print(f"New Agent Name:{active_agent.name}")
-                    cross_agent_memories.append(
-                        {
-                            "role": "assistant",
-                            "content": f"{active_agent.name} is Transferring Function Call: {func_name}({func_params})",
-                        }
-                    )
-                    agent_memory = [
-                        mem
-                        for mem in cross_agent_memories
-                        if mem["content"].startswith(active_agent.name)
-                    ]
-                    # New Agent Function Execution After Transfer
-                    messages = [
-                        {
-                            "role": "user",
-                            "content": (
-                                str(agent_memory) + active_agent.instructions
-                            ).strip(),
-                        }
-                    ]
-                    result = active_agent.send_message(messages)
-                    print(result)
-
-                    agent_function_mapping = {
-                        fun.__name__: fun for fun in active_agent.functions
-                    }
-                    should_break = False
-                    ################ Run the Agent Functions ################
-                    while (
-                        active_agent.is_ochestrator is not True
-                        and result.function_calls
-                    ):
-                        # Execute the agent functions
-                        for func_call in result.function_calls:
-                            try:
-                                func_name = func_call["name"]
-                                # Check for transfer to orchestrator first
-                                if func_name == "transfer_to_orchestrator":
-                                    should_break = True
-                                    break
-
-                                func_params = func_call["parameters"]
-                                func = agent_function_mapping[func_name]
-                                func_result = func(**func_call["parameters"])
-                                print(
-                                    f"{active_agent.name} Finished the Function Result:{func_name} Finished. Result: {func_result}"
-                                )
-                                cross_agent_memories.append(
-                                    {
-                                        "role": "assistant",
-                                        "content": f"{active_agent.name} Finished the Function Call: {func_name}({func_params} with {func_result})",
-                                    }
-                                )
-
-                            except Exception as e:
-                                error_msg = {
-                                    "role": "assistant",
-                                    "content": f"Error executing {func_name}: {str(e)}",
-                                }
-                                print(error_msg)
-                                cross_agent_memories.append(error_msg)
-
-                        if should_break:
-                            break
-
-                        # Only send new message if we're continuing
-                        agent_memory = [
-                            mem
-                            for mem in cross_agent_memories
-                            if mem["content"].startswith(active_agent.name)
-                        ]
-                        messages = [
-                            {
-                                "role": "user",
-                                "content": (
-                                    str(agent_memory) + active_agent.instructions
-                                ).strip(),
-                            }
-                        ]
-                        print(messages)
-                        result = active_agent.send_message(messages)
+            print(session.run(user_input))
+    finally:
+        if log is not None:
+            log.close()
 
 
 if __name__ == "__main__":
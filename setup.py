@@ -10,6 +10,7 @@ setup(
         "ollama>=0.1.0",
         "python-dotenv>=1.0.0",
         "requests>=2.31.0",
+        "msgpack>=1.0.0",
         "typing-extensions>=4.8.0",
     ],
     extras_require={
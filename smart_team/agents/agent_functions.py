@@ -5,19 +5,27 @@ import openai
 from dotenv import load_dotenv
 import os
 import inspect
+import re
 import logging
 from colorama import init, Fore, Style
 
-import datetime
 import sys
 import os
 import subprocess
 import tempfile
 import venv
 from openai import OpenAI
+from ..artifacts import get_default_store
+from ..executors import execution_backend
+from ..http_cache import get_http_cache
+from ..prefetch import speculative
+
+# Characters load_artifact returns per call unless asked for more
+ARTIFACT_CHUNK_CHARS = 4000
 
 
 ############################################################################################ Define Agent Functions ############################################################################################
+@execution_backend("thread")
 def create_virtualenv(env_name: str = "python_env") -> str:
     """
     Creates a Python virtual environment with verbose output.
@@ -67,6 +75,7 @@ def create_virtualenv(env_name: str = "python_env") -> str:
         return error_msg
 
 
+@execution_backend("thread")
 def install_package(env_name: str, package: str) -> str:
     """
     Install a single package in the specified virtual environment.
@@ -118,6 +127,7 @@ def install_package(env_name: str, package: str) -> str:
         return error_msg
 
 
+@execution_backend("thread")
 def execute_code(code: str, env_name: str = "python_env") -> tuple[bool, str]:
     """
     Execute the provided Python code in the specified virtual environment.
@@ -148,18 +158,8 @@ def execute_code(code: str, env_name: str = "python_env") -> tuple[bool, str]:
         )
 
         # Save code regardless of exit code for interactive programs
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        code_filename = f"generated_code_{timestamp}.py"
-
-        # Ensure code directory exists
-        os.makedirs("code", exist_ok=True)
-        permanent_path = os.path.join("code", code_filename)
-
-        # Copy the code to permanent storage
-        with open(permanent_path, "w", encoding="utf-8") as f:
-            f.write(code)
-
-        print(f"Code saved to {permanent_path}")
+        artifact = get_default_store().put(code, suffix=".py")
+        print(f"Code saved to {artifact.path} ({artifact.handle})")
 
         # For interactive programs like games, a non-zero exit code is expected
         # when the user closes the window
@@ -183,92 +183,113 @@ def execute_code(code: str, env_name: str = "python_env") -> tuple[bool, str]:
             pass  # Ignore cleanup errors
 
 
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
-from typing import Optional, Union
-import random
+import threading
+from typing import Optional
+from ..search import (
+    BM25Index,
+    LocalIndexBackend,
+    SearchBackend,
+    TieredSearchBackend,
+    remove_repeated_paragraphs,
+)
+from ..search.web import WebSearchBackend
 
-# List of user-agent strings to rotate
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0",
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 11_2_3) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0.3 Safari/605.1.15",
-]
+_search_backend: Optional[SearchBackend] = None
+_search_backend_lock = threading.Lock()
 
 
+def get_search_backend() -> SearchBackend:
+    """
+    Returns the backend used by search_and_fetch_content.
+
+    By default this is a local BM25 index of every page fetched so far (saved to
+    SMART_TEAM_SEARCH_INDEX, default search_index.jsonl) that falls back to a web
+    search when the index has too few fresh, relevant pages. Set
+    SMART_TEAM_SEARCH_OFFLINE=true to answer from the local index only.
+    """
+    global _search_backend
+    with _search_backend_lock:
+        if _search_backend is None:
+            index = BM25Index(path=os.getenv("SMART_TEAM_SEARCH_INDEX", "search_index.jsonl"))
+            offline = os.getenv("SMART_TEAM_SEARCH_OFFLINE", "false").lower() == "true"
+            _search_backend = TieredSearchBackend(
+                LocalIndexBackend(index), None if offline else WebSearchBackend()
+            )
+        return _search_backend
+
+
+def set_search_backend(backend: SearchBackend):
+    """
+    Replaces the backend used by search_and_fetch_content.
+
+    Args:
+        backend (SearchBackend): The backend to use, for example a LocalIndexBackend for offline runs.
+    """
+    global _search_backend
+    with _search_backend_lock:
+        _search_backend = backend
+
+
+@speculative(lambda task: {"query": task})
+@execution_backend("thread", parallel_safe=True)
 def search_and_fetch_content(
     query: str,
-    num_results: Union[int, str] = 5,
-    use_random_user_agent: Union[bool, str] = True,
+    num_results: int = 5,
+    use_random_user_agent: bool = True,
 ) -> str:
     """
-    Performs a Google search, retrieves content from the resulting URLs, and concatenates the content with the URLs.
+    Searches previously fetched pages and the web, and concatenates the content with the URLs.
     The result is returned as a single string.
 
     Args:
         query (str): The search query to use in Google.
-        num_results (Union[int, str]): The number of search results to retrieve. If passed as a string, it will be converted to an integer.
-        use_random_user_agent (Union[bool, str]): If passed as a string, it will be converted to a boolean.
+        num_results (int): The number of search results to retrieve.
+        use_random_user_agent (bool): Whether to send a browser user agent, picked per host, with each request.
 
     Returns:
         str: A single concatenated string containing the URLs and their corresponding content.
     """
     max_tokens = 200
-    # Convert num_results to an integer if it's passed as a string
-    if isinstance(num_results, str):
-        num_results = int(num_results)
-
-    # Convert use_random_user_agent to a boolean if it's passed as a string
-    if isinstance(use_random_user_agent, str):
-        use_random_user_agent = use_random_user_agent.lower() == "true"
-
-    results = []
-    urls_processed = 0
-    urls_to_fetch = (
-        num_results + 5
-    )  # Fetch additional URLs to ensure we get valid results
-    urls = search(query, num_results=urls_to_fetch)
-
-    for url in urls:
-        if urls_processed >= num_results:
+    backend = get_search_backend()
+    pages, contents = [], []
+    seen_paragraphs, tried = set(), set()
+    # Pages with nothing new left are replaced by the next candidates, a few times at most
+    for _ in range(3):
+        batch = [
+            page
+            for page in backend.search(
+                query,
+                num_results - len(pages),
+                use_random_user_agent=use_random_user_agent,
+                exclude=tried,
+            )
+            if page.url not in tried
+        ]
+        if not batch:
+            break
+        tried.update(page.url for page in batch)
+        # Drop cookie notices, bylines and other paragraphs repeated across pages
+        cleaned = remove_repeated_paragraphs([page.content for page in batch], seen_paragraphs)
+        for page, content in zip(batch, cleaned):
+            if content.strip():
+                pages.append(page)
+                contents.append(content)
+        if len(pages) >= num_results:
             break
 
-        headers = {}
-        if use_random_user_agent:
-            user_agent = random.choice(USER_AGENTS)
-            headers["User-Agent"] = user_agent
-
-        try:
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, "html.parser")
-
-                # Extract content from <p> tags
-                paragraphs = soup.find_all("p")
-                content_list = [para.get_text().strip() for para in paragraphs]
-
-                full_content = "\n".join(content_list)
-
-                if max_tokens is not None:
-                    tokens = full_content.split()
-                    full_content = " ".join(tokens[:max_tokens])
-                # Concatenate the URL with the content
-                results.append("URL: " + url + "\nContent:\n" + full_content + "\n")
-
-                urls_processed += 1
-            else:
-                print(
-                    "Failed to retrieve content from "
-                    + url
-                    + " (Status Code: "
-                    + str(response.status_code)
-                    + ")"
-                )
-        except Exception as e:
-            print("An error occurred while retrieving " + url + ": " + str(e))
+    results = []
+    for page, full_content in zip(pages, contents):
+        tokens = full_content.split()
+        # Concatenate the URL with the content
+        result = "URL: " + page.url + "\nContent:\n" + " ".join(tokens[:max_tokens]) + "\n"
+        if len(tokens) > max_tokens:
+            # Keep the rest of the page out of the conversation but within reach
+            artifact = get_default_store().put(full_content, suffix=".txt")
+            result += (
+                f"[Truncated to {max_tokens} words. Full page ({len(full_content)} characters) "
+                f"stored as {artifact.handle}; call load_artifact to read it]\n"
+            )
+        results.append(result)
 
     if len(results) < num_results:
         print(
@@ -283,9 +304,40 @@ def search_and_fetch_content(
     return "\n".join(results)
 
 
+def load_artifact(handle: str, offset: int = 0, max_chars: int = ARTIFACT_CHUNK_CHARS) -> str:
+    """
+    Loads stored content (for example the full text of a search result page) referenced by an artifact handle.
+
+    Args:
+        handle (str): The artifact handle, starting with artifact://
+        offset (int): Character position to start reading from.
+        max_chars (int): Maximum number of characters to return.
+
+    Returns:
+        str: The requested part of the stored content, or an error message.
+    """
+    try:
+        content = get_default_store().get_text(handle)
+    except (KeyError, ValueError) as e:
+        return f"Error loading {handle}: {str(e)}"
+
+    chunk = content[offset : offset + max_chars]
+    if offset + max_chars < len(content):
+        chunk += f"\n[{len(content) - offset - max_chars} more characters; call load_artifact with offset={offset + max_chars}]"
+    return chunk
+
+
 import requests
 
 
+def _guess_city(task: str) -> Optional[dict]:
+    """Guess the city in a task such as 'Get temperature in New York'"""
+    match = re.search(r"\b(?:in|for|at|of)\s+([A-Z][\w'.-]*(?:\s+[A-Z][\w'.-]*)*)", task)
+    return {"city": match.group(1)} if match else None
+
+
+@speculative(_guess_city)
+@execution_backend("thread", parallel_safe=True)
 def get_weather(city: str) -> str:
     """
     Retrieves the current temperature for a specified city.
@@ -307,7 +359,7 @@ def get_weather(city: str) -> str:
     try:
         if city.strip() == "":
             return "Please provide a city name"
-        response = requests.get(url, timeout=5)
+        response = get_http_cache().get(url, timeout=5)
         response.raise_for_status()  # Raise an exception for bad status codes
         temperature = response.text.strip()
         if not temperature:
@@ -4,7 +4,8 @@ from typing import List, Dict, Any
 from anthropic import Anthropic
 from .base_agent import BaseAgent
 from ..types import AgentResponse
-from dynamic_agent.utils.function_schema import create_function_schema, SchemaFormat
+from ..utils import create_function_schema, SchemaFormat
+from ..metrics import track_llm
 
 
 class AnthropicAgent(BaseAgent):
@@ -28,12 +29,17 @@ class AnthropicAgent(BaseAgent):
         tools = self._get_tool_schemas() if self.functions else []
 
         # Get response from Claude
-        response = self.client.messages.create(
-            model=self.model,
-            messages=messages,
-            max_tokens=8192,
-            tools=tools,
-        )
+        with track_llm("anthropic", self.name, self.model) as call:
+            response = self.client.messages.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=8192,
+                tools=tools,
+            )
+            usage = getattr(response, "usage", None)
+            call.usage(
+                getattr(usage, "input_tokens", 0), getattr(usage, "output_tokens", 0)
+            )
 
         # Get the response texts and the function calls seperately
         text_parts = []
@@ -10,7 +10,7 @@ class BaseAgent(ABC):
 
     def __init__(self, name: str, instructions: str, functions: List = None, **kwargs):
         """Initialize the agent"""
-        self.is_ochestrator: bool = False
+        self.is_ochestrator: bool = kwargs.pop("is_orchestrator", False)
         self.name = name
         self.instructions = instructions
         self.functions = functions or []
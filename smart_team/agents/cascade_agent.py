@@ -0,0 +1,140 @@
+"""Agent that tries cheaper models first and escalates to stronger ones"""
+
+import threading
+from collections import Counter
+from importlib import import_module
+from typing import Callable, Dict, List, Optional, Union
+from .base_agent import BaseAgent
+from ..types import AgentResponse
+from ..metrics import REGISTRY
+from ..validation import ArgumentError, ToolValidator
+
+CASCADE_REQUESTS = REGISTRY.counter(
+    "smart_team_cascade_requests_total", "Requests answered by each cascade tier"
+)
+CASCADE_ESCALATIONS = REGISTRY.counter(
+    "smart_team_cascade_escalations_total", "Cascade escalations by agent, model and reason"
+)
+
+PROVIDERS = {
+    "anthropic": ("smart_team.agents.anthropic_agent", "AnthropicAgent"),
+    "openai": ("smart_team.agents.openai_agent", "OpenAIAgent"),
+    "ollama": ("smart_team.agents.ollama_agent", "OllamaAgent"),
+}
+
+# A check returns the reason to escalate, or None when the response is acceptable
+Check = Callable[["CascadeAgent", AgentResponse], Optional[str]]
+
+
+def check_not_empty(agent: "CascadeAgent", response: AgentResponse) -> Optional[str]:
+    if not (response.text or "").strip() and not response.function_calls:
+        return "empty_answer"
+    return None
+
+
+def check_not_error(agent: "CascadeAgent", response: AgentResponse) -> Optional[str]:
+    # OllamaAgent reports request failures as text
+    if (response.text or "").startswith("Error:") and not response.function_calls:
+        return "error"
+    return None
+
+
+def check_function_calls(agent: "CascadeAgent", response: AgentResponse) -> Optional[str]:
+    for func_call in response.function_calls or []:
+        if not isinstance(func_call, dict) or not isinstance(func_call.get("parameters"), dict):
+            return "malformed_tool_call"
+        validator = agent.validators.get(func_call.get("name"))
+        if validator is None:
+            return "unknown_function"
+        try:
+            validator(func_call["parameters"])
+        except ArgumentError:
+            return "invalid_arguments"
+    return None
+
+
+DEFAULT_CHECKS: List[Check] = [check_not_error, check_not_empty, check_function_calls]
+
+
+class CascadeAgent(BaseAgent):
+    """Sends each request to a list of model tiers, cheapest first.
+
+    A tier's response is returned unless one of the checks rejects it
+    (empty answer, unknown function name, malformed call or arguments the
+    tool's validator rejects) or the tier raises; then the next tier is
+    tried. The last tier's response is always returned.
+
+    Tiers are given as agents or as dicts with a `provider` ("anthropic",
+    "openai" or "ollama") and the keyword arguments for that agent, e.g.
+    {"provider": "anthropic", "model": "claude-3-5-haiku-latest", "api_key": ...}.
+    """
+
+    def _init_client(self, **kwargs):
+        tiers: List[Union[BaseAgent, Dict]] = kwargs.get("tiers") or []
+        if not tiers:
+            raise ValueError("tiers are required for CascadeAgent")
+        self.tiers: List[BaseAgent] = [self._build_tier(tier) for tier in tiers]
+        self.model = " > ".join(str(getattr(tier, "model", tier.name)) for tier in self.tiers)
+        self.checks: List[Check] = kwargs.get("checks") or DEFAULT_CHECKS
+        self.validators = {func.__name__: ToolValidator(func) for func in self.functions}
+        self.agent_memory = []
+        # One cascade can serve several sessions at once
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.tier_counts: Counter = Counter()
+        self.escalations: Counter = Counter()
+
+    def _build_tier(self, tier: Union[BaseAgent, Dict]) -> BaseAgent:
+        if isinstance(tier, BaseAgent):
+            return tier
+        config = dict(tier)
+        provider = config.pop("provider", None)
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown cascade provider: {provider}")
+        module_name, class_name = PROVIDERS[provider]
+        agent_class = getattr(import_module(module_name), class_name)
+        return agent_class(
+            name=self.name,
+            instructions=self.instructions,
+            functions=self.functions,
+            **config,
+        )
+
+    def _rejection(self, response: AgentResponse) -> Optional[str]:
+        for check in self.checks:
+            reason = check(self, response)
+            if reason:
+                return reason
+        return None
+
+    def escalation_rate(self) -> float:
+        """Fraction of requests that were escalated at least once"""
+        with self._stats_lock:
+            if not self.requests:
+                return 0.0
+            return 1 - self.tier_counts[0] / self.requests
+
+    def send_message(self, messages: Dict) -> AgentResponse:
+        with self._stats_lock:
+            self.requests += 1
+        last = len(self.tiers) - 1
+        for position, tier in enumerate(self.tiers):
+            model = str(getattr(tier, "model", tier.name))
+            try:
+                response = tier.send_message(messages)
+            except Exception as e:
+                if position == last:
+                    raise
+                reason = "exception"
+                print(f"{self.name}: {model} failed ({str(e)}), escalating")
+            else:
+                reason = self._rejection(response) if position < last else None
+                if reason is None:
+                    with self._stats_lock:
+                        self.tier_counts[position] += 1
+                    CASCADE_REQUESTS.inc(agent=self.name, model=model)
+                    return response
+
+            with self._stats_lock:
+                self.escalations[reason] += 1
+            CASCADE_ESCALATIONS.inc(agent=self.name, model=model, reason=reason)
@@ -1,11 +1,80 @@
 """Ollama-specific agent implementation"""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import heapq
+import itertools
 import json
+import os
+import threading
+from contextlib import contextmanager
 import ollama
 from .base_agent import BaseAgent
 from ..types import AgentResponse
-from dynamic_agent.utils.function_schema import create_function_schema, SchemaFormat
+from ..utils import create_function_schema, SchemaFormat
+from ..metrics import QUEUE_DEPTH, track_llm
+
+# Ollama reports durations in nanoseconds
+_NS_PER_S = 1_000_000_000
+
+
+class OllamaScheduler:
+    """Priority queue in front of one local Ollama server.
+
+    At most `max_parallel` requests run at once (match the server's
+    OLLAMA_NUM_PARALLEL); waiting requests are started lowest priority value
+    first, then in arrival order.
+    """
+
+    _schedulers: Dict[str, "OllamaScheduler"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, max_parallel: int = 1, name: str = "ollama"):
+        self.max_parallel = max(1, int(max_parallel))
+        self.name = name
+        self.active = 0
+        self._waiting: List = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    @classmethod
+    def for_host(cls, host: str, max_parallel: Optional[int] = None) -> "OllamaScheduler":
+        """Get the scheduler shared by all agents talking to a host"""
+        with cls._registry_lock:
+            scheduler = cls._schedulers.get(host)
+            if scheduler is None:
+                if max_parallel is None:
+                    max_parallel = int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+                scheduler = cls(max_parallel, name=f"ollama:{host}")
+                cls._schedulers[host] = scheduler
+            elif max_parallel is not None:
+                scheduler.max_parallel = max(1, int(max_parallel))
+            return scheduler
+
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot"""
+        with self._cond:
+            return len(self._waiting)
+
+    @contextmanager
+    def slot(self, priority: int = 0):
+        """Wait for a free slot on the server and hold it for the block"""
+        ticket = (priority, next(self._counter))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            QUEUE_DEPTH.set(len(self._waiting), queue=self.name)
+            while self._waiting[0] != ticket or self.active >= self.max_parallel:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            QUEUE_DEPTH.set(len(self._waiting), queue=self.name)
+            self.active += 1
+            # Let the next waiter check for another free slot
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
 
 
 class OllamaAgent(BaseAgent):
@@ -13,9 +82,76 @@ class OllamaAgent(BaseAgent):
         """Initialize the Ollama client"""
         self.model = kwargs.get("model", "llama2")
         self.api_key = kwargs.get("api_key")  # Not used by Ollama but kept for API consistency
-        self.client = ollama.Client(host=kwargs.get("base_url", "http://localhost:11434"))
+        self.base_url = kwargs.get("base_url", "http://localhost:11434")
+        self.client = ollama.Client(host=self.base_url)
         self.agent_memory = []
 
+        # Keep the model resident between turns instead of the server default
+        self.keep_alive = kwargs.get("keep_alive", "30m")
+        self.options = dict(kwargs.get("options") or {})
+        if kwargs.get("num_ctx") is not None:
+            self.options["num_ctx"] = kwargs["num_ctx"]
+        self.priority = kwargs.get("priority", 0)
+        self.scheduler = OllamaScheduler.for_host(
+            self.base_url, kwargs.get("max_parallel")
+        )
+        self.last_metrics: Dict[str, float] = {}
+        # Requests from concurrent sessions update the totals together
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "requests": 0,
+            "preloads": 0,
+            "load_seconds": 0.0,
+            "prompt_eval_seconds": 0.0,
+            "eval_seconds": 0.0,
+            "prompt_tokens": 0,
+            "eval_tokens": 0,
+        }
+
+        if kwargs.get("preload", True):
+            self.preload()
+
+    def preload(self) -> bool:
+        """Load the model into memory so the first request does not pay for it"""
+        try:
+            with self.scheduler.slot(self.priority):
+                # Same options as chat, so the first request does not reload the model
+                response = self.client.generate(
+                    model=self.model,
+                    prompt="",
+                    options=self.options or None,
+                    keep_alive=self.keep_alive,
+                )
+            self._record_metrics(response, preload=True)
+            return True
+        except Exception as e:
+            print(f"Could not preload Ollama model {self.model}: {str(e)}")
+            return False
+
+    def _record_metrics(self, response, preload: bool = False) -> Dict[str, float]:
+        """Split Ollama's timing fields into model load time and generation time"""
+
+        def field(name):
+            value = getattr(response, name, None)
+            if value is None and isinstance(response, dict):
+                value = response.get(name)
+            return value or 0
+
+        metrics = {
+            "total_seconds": field("total_duration") / _NS_PER_S,
+            "load_seconds": field("load_duration") / _NS_PER_S,
+            "prompt_eval_seconds": field("prompt_eval_duration") / _NS_PER_S,
+            "eval_seconds": field("eval_duration") / _NS_PER_S,
+            "prompt_tokens": field("prompt_eval_count"),
+            "eval_tokens": field("eval_count"),
+        }
+        with self._metrics_lock:
+            self.last_metrics = metrics
+            self.metrics["preloads" if preload else "requests"] += 1
+            for key in ("load_seconds", "prompt_eval_seconds", "eval_seconds", "prompt_tokens", "eval_tokens"):
+                self.metrics[key] += metrics[key]
+        return metrics
+
     def _transform_messages(self, messages: List[Dict]) -> List[Dict]:
         """Transform messages to Ollama format while preserving original structure"""
         if not isinstance(messages, list):
@@ -51,12 +187,18 @@ class OllamaAgent(BaseAgent):
         ollama_messages = self._transform_messages(messages)
 
         try:
-            # Send request to Ollama
-            response = self.client.chat(
-                model=self.model,
-                messages=ollama_messages,
-                tools=tools,
-            )
+            # Send request to Ollama once the local server has a free slot
+            with self.scheduler.slot(self.priority):
+                with track_llm("ollama", self.name, self.model) as call:
+                    response = self.client.chat(
+                        model=self.model,
+                        messages=ollama_messages,
+                        tools=tools,
+                        options=self.options or None,
+                        keep_alive=self.keep_alive,
+                    )
+                    metrics = self._record_metrics(response)
+                    call.usage(metrics["prompt_tokens"], metrics["eval_tokens"])
             response_data = self._transform_response(response)
         except Exception as e:
             return AgentResponse(text=f"Error: {str(e)}", function_calls=[])
@@ -68,10 +210,14 @@ class OllamaAgent(BaseAgent):
 
         # Handle tool calls if present
         for tool_call in response_data.get("tool_calls", []):
-            try:
-                parameters = json.loads(tool_call.function.arguments)
-            except (json.JSONDecodeError, AttributeError, TypeError):
-                parameters = {}
+            arguments = getattr(tool_call.function, "arguments", None)
+            if isinstance(arguments, dict):
+                parameters = arguments
+            else:
+                try:
+                    parameters = json.loads(arguments)
+                except (json.JSONDecodeError, AttributeError, TypeError):
+                    parameters = {}
 
             func_call = {
                 "name": tool_call.function.name,
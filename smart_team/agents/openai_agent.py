@@ -5,7 +5,8 @@ import json
 from openai import OpenAI
 from .base_agent import BaseAgent
 from ..types import AgentResponse
-from dynamic_agent.utils.function_schema import create_function_schema, SchemaFormat
+from ..utils import create_function_schema, SchemaFormat
+from ..metrics import track_llm
 
 
 class OpenAIAgent(BaseAgent):
@@ -32,12 +33,18 @@ class OpenAIAgent(BaseAgent):
         tools = self._get_tool_schemas() if self.functions else []
 
         # Get response from OpenAI
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            tools=tools,
-            tool_choice="auto",
-        )
+        with track_llm("openai", self.name, self.model) as call:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto",
+            )
+            usage = getattr(response, "usage", None)
+            call.usage(
+                getattr(usage, "prompt_tokens", 0),
+                getattr(usage, "completion_tokens", 0),
+            )
 
         # Process the response
         result = AgentResponse()
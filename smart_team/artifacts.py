@@ -0,0 +1,172 @@
+"""
+Module: artifacts.py
+Purpose: Content-addressed store for generated code and large tool outputs
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+HANDLE_PREFIX = "artifact://"
+
+
+@dataclass
+class Artifact:
+    """Handle to stored content"""
+
+    digest: str
+    size: int
+    path: str
+
+    @property
+    def handle(self) -> str:
+        return f"{HANDLE_PREFIX}{self.digest}"
+
+
+def parse_handle(handle: str) -> str:
+    """Get the digest from an artifact handle"""
+    digest = handle[len(HANDLE_PREFIX) :] if handle.startswith(HANDLE_PREFIX) else handle
+    digest = digest.strip()
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Invalid artifact handle: {handle}")
+    return digest
+
+
+class ArtifactStore:
+    """Stores content on disk under the SHA-256 of its bytes.
+
+    Identical content is stored once. Writes go to a temporary file that is
+    renamed into place, so concurrent writers of the same content never see a
+    partial file. When the store grows past `max_bytes`, the least recently
+    used artifacts are removed. The store's size is kept as a running total,
+    so the directory is only scanned when the quota is crossed.
+    """
+
+    def __init__(self, root: str = "artifacts", max_bytes: int = 256 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._total = self.total_bytes()
+
+    def _find(self, digest: str) -> Optional[str]:
+        directory = os.path.join(self.root, digest[:2])
+        if not os.path.isdir(directory):
+            return None
+        for name in os.listdir(directory):
+            if name.split(".", 1)[0] == digest:
+                return os.path.join(directory, name)
+        return None
+
+    def put(self, content: Union[str, bytes], suffix: str = "") -> Artifact:
+        """Store content and return its handle; existing content is not rewritten"""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+
+        existing = self._find(digest)
+        if existing is not None:
+            os.utime(existing)  # Mark as recently used
+            return Artifact(digest=digest, size=len(data), path=existing)
+
+        directory = os.path.join(self.root, digest[:2])
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, digest + suffix)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                # Another writer may have stored the same content meanwhile
+                added = not os.path.exists(path)
+                os.replace(temp_path, path)
+                if added:
+                    self._total += len(data)
+                over_quota = self._total > self.max_bytes
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        if over_quota:
+            self.evict(keep=digest)
+        return Artifact(digest=digest, size=len(data), path=path)
+
+    def get(self, handle: str) -> bytes:
+        """Read the content of an artifact"""
+        path = self.path(handle)
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+        return data
+
+    def get_text(self, handle: str) -> str:
+        """Read the content of an artifact as text"""
+        return self.get(handle).decode("utf-8", errors="replace")
+
+    def path(self, handle: str) -> str:
+        """Get the file path of an artifact"""
+        path = self._find(parse_handle(handle))
+        if path is None:
+            raise KeyError(f"Artifact not found: {handle}")
+        return path
+
+    def exists(self, handle: str) -> bool:
+        try:
+            return self._find(parse_handle(handle)) is not None
+        except ValueError:
+            return False
+
+    def _entries(self) -> List[os.DirEntry]:
+        entries = []
+        for shard in os.scandir(self.root):
+            if shard.is_dir():
+                entries.extend(
+                    entry
+                    for entry in os.scandir(shard.path)
+                    if entry.is_file() and not entry.name.startswith(".tmp-")
+                )
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Remove least recently used artifacts until the store fits its quota"""
+        removed = 0
+        with self._lock:
+            entries = [(entry.stat(), entry.path, entry.name) for entry in self._entries()]
+            total = sum(stat.st_size for stat, _, _ in entries)
+            for stat, path, name in sorted(entries, key=lambda item: item[0].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                if name.split(".", 1)[0] == keep:
+                    continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= stat.st_size
+                removed += 1
+            # The scan also corrects the running total for changes made by other processes
+            self._total = total
+        return removed
+
+
+_default_store: Optional[ArtifactStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_store() -> ArtifactStore:
+    """Get the process-wide store, configured by SMART_TEAM_ARTIFACT_DIR and SMART_TEAM_ARTIFACT_MAX_BYTES"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore(
+                root=os.getenv("SMART_TEAM_ARTIFACT_DIR", "artifacts"),
+                max_bytes=int(os.getenv("SMART_TEAM_ARTIFACT_MAX_BYTES", 256 * 1024 * 1024)),
+            )
+        return _default_store
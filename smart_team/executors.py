@@ -0,0 +1,187 @@
+"""
+Module: executors.py
+Purpose: Run tools inline, in a shared thread pool, in a process pool or in an isolated subprocess
+"""
+
+from __future__ import annotations
+import atexit
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+SUBPROCESS = "subprocess"
+BACKENDS = (INLINE, THREAD, PROCESS, SUBPROCESS)
+
+
+def execution_backend(backend: str, timeout: Optional[float] = None, parallel_safe: bool = False) -> Callable:
+    """Declare where a tool runs.
+
+    Args:
+        backend (str): One of "inline" (caller's thread), "thread" (shared thread pool,
+            for blocking I/O), "process" (process pool, for CPU-bound work) or
+            "subprocess" (a fresh Python interpreter per call, for isolation).
+        timeout (Optional[float]): Seconds to wait for the result before giving up.
+        parallel_safe (bool): Whether the tool may run at the same time as other
+            parallel-safe calls from the same response. Leave it off for tools whose
+            calls depend on each other, such as installing a package and then running code.
+
+    Functions run in "process" or "subprocess" must be importable module-level
+    functions, and their arguments and results must be picklable.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown execution backend: {backend}")
+
+    def decorator(func: Callable) -> Callable:
+        func.execution_backend = backend
+        func.execution_timeout = timeout
+        func.parallel_safe = parallel_safe
+        return func
+
+    return decorator
+
+
+def get_backend(func: Callable) -> str:
+    """Get the declared backend of a function, inline if none was declared"""
+    return getattr(func, "execution_backend", INLINE)
+
+
+def is_parallel_safe(func: Callable) -> bool:
+    """Whether a function was declared safe to run alongside other calls"""
+    return getattr(func, "parallel_safe", False)
+
+
+def _process_context():
+    # Forking a process that already runs threads can deadlock the child
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _run_in_subprocess(func: Callable, args: tuple, kwargs: dict, timeout: Optional[float]) -> Any:
+    payload = pickle.dumps((func, args, kwargs))
+    completed = subprocess.run(
+        [sys.executable, "-m", "smart_team.executors"],
+        input=payload,
+        capture_output=True,
+        timeout=timeout,
+    )
+    if completed.returncode != 0 or not completed.stdout:
+        raise RuntimeError(
+            f"Subprocess for {getattr(func, '__name__', func)} failed: "
+            + completed.stderr.decode("utf-8", errors="replace")
+        )
+    ok, value = pickle.loads(completed.stdout)
+    if not ok:
+        raise value
+    return value
+
+
+class ToolRuntime:
+    """Owns the pools that tools run on.
+
+    Pools are created on first use. The thread pool defaults to
+    min(32, cpu_count + 4) workers and the process pool to cpu_count workers.
+    Process pool workers are started with forkserver (spawn where it is not
+    available) rather than fork, since the runtime is used from a process that
+    already runs threads. Subprocess calls are started from the thread pool so
+    they do not block the caller.
+    """
+
+    def __init__(self, max_threads: Optional[int] = None, max_processes: Optional[int] = None):
+        cpus = os.cpu_count() or 1
+        self.max_threads = max_threads or min(32, cpus + 4)
+        self.max_processes = max_processes or cpus
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.max_threads, thread_name_prefix="smart-team-tool"
+                )
+            return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.max_processes, mp_context=_process_context()
+                )
+            return self._processes
+
+    def submit(self, func: Callable, *args, backend: Optional[str] = None, **kwargs) -> Future:
+        """Start func on its backend and return a future for the result"""
+        backend = backend or get_backend(func)
+        if backend == THREAD:
+            return self._thread_pool().submit(func, *args, **kwargs)
+        if backend == PROCESS:
+            return self._process_pool().submit(func, *args, **kwargs)
+        if backend == SUBPROCESS:
+            timeout = getattr(func, "execution_timeout", None)
+            return self._thread_pool().submit(_run_in_subprocess, func, args, kwargs, timeout)
+        if backend != INLINE:
+            raise ValueError(f"Unknown execution backend: {backend}")
+
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def call(self, func: Callable, *args, backend: Optional[str] = None, **kwargs) -> Any:
+        """Run func on its backend and wait for the result"""
+        future = self.submit(func, *args, backend=backend, **kwargs)
+        return future.result(timeout=getattr(func, "execution_timeout", None))
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pools; they are recreated if the runtime is used again"""
+        with self._lock:
+            threads, self._threads = self._threads, None
+            processes, self._processes = self._processes, None
+        if threads is not None:
+            threads.shutdown(wait=wait)
+        if processes is not None:
+            processes.shutdown(wait=wait)
+
+
+_default_runtime: Optional[ToolRuntime] = None
+_default_lock = threading.Lock()
+
+
+def get_runtime() -> ToolRuntime:
+    """Get the process-wide runtime, sized by SMART_TEAM_TOOL_THREADS and SMART_TEAM_TOOL_PROCESSES"""
+    global _default_runtime
+    with _default_lock:
+        if _default_runtime is None:
+            threads = os.getenv("SMART_TEAM_TOOL_THREADS")
+            processes = os.getenv("SMART_TEAM_TOOL_PROCESSES")
+            _default_runtime = ToolRuntime(
+                max_threads=int(threads) if threads else None,
+                max_processes=int(processes) if processes else None,
+            )
+            atexit.register(_default_runtime.shutdown)
+        return _default_runtime
+
+
+if __name__ == "__main__":
+    # Entry point of the subprocess backend: pickled call on stdin, pickled result on stdout
+    func, args, kwargs = pickle.loads(sys.stdin.buffer.read())
+    stdout = sys.stdout
+    # Keep prints from the tool out of the result stream
+    sys.stdout = sys.stderr
+    try:
+        result = (True, func(*args, **kwargs))
+    except Exception as e:
+        result = (False, e)
+    stdout.buffer.write(pickle.dumps(result))
+    stdout.flush()
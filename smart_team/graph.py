@@ -0,0 +1,489 @@
+"""
+Module: graph.py
+Purpose: Compile agents into a graph and run sessions over it with hop limits and loop detection
+"""
+
+from __future__ import annotations
+import json
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .agents.base_agent import BaseAgent
+from .executors import ToolRuntime, get_runtime, is_parallel_safe
+from .metrics import track_tool
+from .prefetch import Prefetcher, tool_key
+from .session_log import SessionLog
+from .singleflight import SingleFlight, default_flight, make_key
+from .types import AgentResponse
+from .validation import ArgumentError, ToolValidator
+
+TRANSFER_PREFIX = "transfer_to_"
+
+
+class GraphError(RuntimeError):
+    """Base error raised when a session has to stop running agents"""
+
+
+class HopLimitExceeded(GraphError):
+    """Raised when a session transfers between agents too many times"""
+
+
+class ToolCallLimitExceeded(GraphError):
+    """Raised when a session executes too many tool calls"""
+
+
+class LoopDetected(GraphError):
+    """Raised when an agent repeats the same call with the same arguments"""
+
+
+@dataclass
+class AgentNode:
+    """An agent together with its precomputed dispatch tables"""
+
+    agent: BaseAgent
+    tools: Dict[str, Callable] = field(default_factory=dict)
+    validators: Dict[str, ToolValidator] = field(default_factory=dict)
+    transfers: Dict[str, BaseAgent] = field(default_factory=dict)
+
+
+class AgentGraph:
+    """Agents as nodes and their `transfer_to_*` functions as edges.
+
+    The graph is compiled once: every transfer function is resolved to its
+    target agent and every other function is placed in a per-agent lookup
+    table together with an argument validator built from its type hints, so
+    dispatching a call is a single dictionary access.
+    """
+
+    def __init__(self, agents: List[BaseAgent], entry: Optional[BaseAgent] = None):
+        if not agents:
+            raise ValueError("AgentGraph requires at least one agent")
+        self.entry = entry or next(
+            (agent for agent in agents if agent.is_ochestrator), agents[0]
+        )
+        self.nodes: Dict[str, AgentNode] = {}
+        for agent in agents:
+            self.add_agent(agent)
+        if self.entry.name not in self.nodes:
+            self.add_agent(self.entry)
+
+    def add_agent(self, agent: BaseAgent) -> AgentNode:
+        """Compile an agent's functions into dispatch tables, following transfer edges"""
+        if agent.name in self.nodes:
+            return self.nodes[agent.name]
+
+        node = AgentNode(agent=agent)
+        self.nodes[agent.name] = node
+        for func in agent.functions:
+            if func.__name__.startswith(TRANSFER_PREFIX):
+                # Transfer functions only look up their target agent
+                target = func(task="")
+                if not isinstance(target, BaseAgent):
+                    raise ValueError(
+                        f"{func.__name__} on {agent.name} did not return an agent"
+                    )
+                node.transfers[func.__name__] = target
+                self.add_agent(target)
+            else:
+                node.tools[func.__name__] = func
+                node.validators[func.__name__] = ToolValidator(func)
+        return node
+
+    def node(self, agent: BaseAgent) -> AgentNode:
+        """Get the compiled node for an agent"""
+        return self.nodes[agent.name]
+
+    def edges(self) -> List[Tuple[str, str, str]]:
+        """List all edges as (source agent, transfer function, target agent)"""
+        return [
+            (name, func_name, target.name)
+            for name, node in self.nodes.items()
+            for func_name, target in node.transfers.items()
+        ]
+
+
+@dataclass
+class SessionBudget:
+    """Limits applied to each request handled by a session"""
+
+    max_hops: int = 10
+    max_tool_calls: int = 30
+    max_repeats: int = 2
+
+
+def call_signature(agent: BaseAgent, func_name: str, params: Dict) -> Tuple[str, str, str]:
+    """Build a hashable (agent, function, arguments) key for a function call"""
+    try:
+        args = json.dumps(params, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        args = repr(params)
+    return (agent.name, func_name, args)
+
+
+class GraphSession:
+    """Runs user requests over an AgentGraph.
+
+    Each request starts at the active agent and follows function calls until
+    an agent answers without calling anything. The session stops early when
+    the hop or tool-call budget runs out, or when an agent repeats an identical
+    call more than `max_repeats` times.
+
+    LLM requests and tool calls go through a SingleFlight group (shared by all
+    sessions unless one is passed in), so identical calls running at the same
+    time in several sessions share one underlying call.
+
+    With a SessionLog the session restores its memories and active agent from
+    the log and appends every change to it. If the previous run stopped in the
+    middle of a request, running the same request again resumes it: logged LLM
+    responses and tool results of that request are reused instead of calling
+    again. Results are never reused across requests.
+
+    Tools run on the execution backend they declare with `execution_backend`
+    (inline by default) through the session's ToolRuntime. Calls from one
+    response run in order; consecutive calls to tools declared `parallel_safe`
+    run concurrently.
+
+    When one response transfers to several agents, each of them runs as a
+    concurrent branch until it transfers back; the transferring agent then
+    continues with all of their results in its history.
+
+    With `prefetch=True`, transferring to an agent with a `task` immediately
+    starts the calls its `speculative` tools predict from the task, in parallel
+    with the agent's own LLM call. A speculative result is used if the agent
+    makes the same call and thrown away otherwise; `prefetcher.stats()`
+    reports hits and wasted calls.
+    """
+
+    def __init__(
+        self,
+        graph: AgentGraph,
+        budget: Optional[SessionBudget] = None,
+        verbose: bool = True,
+        flight: Optional[SingleFlight] = None,
+        log: Optional[SessionLog] = None,
+        runtime: Optional[ToolRuntime] = None,
+        prefetch: bool = False,
+    ):
+        self.graph = graph
+        self.budget = budget or SessionBudget()
+        self.flight = flight or default_flight
+        self.runtime = runtime or get_runtime()
+        self.prefetcher = Prefetcher(self.runtime, self.flight) if prefetch else None
+        self.verbose = verbose
+        self.log = log
+        self.active_agent = graph.entry
+        self.memories: List[Dict[str, str]] = []
+        if log is not None:
+            # The log owns the memories list and appends to it
+            self.memories = log.memories
+            if log.active_agent in graph.nodes:
+                self.active_agent = graph.nodes[log.active_agent].agent
+        self.hops = 0
+        self.tool_calls = 0
+        self._seen_calls: Counter = Counter()
+        self._turn: Optional[int] = None
+        self._occurrences: Counter = Counter()
+        # Branches of a fan-out share the memories and the budget
+        self._lock = threading.RLock()
+
+    def _log(self, message: Any):
+        if self.verbose:
+            print(message)
+
+    def _remember(self, content: str, role: str = "assistant"):
+        memory = {"role": role, "content": content}
+        with self._lock:
+            if self.log is not None:
+                self.log.append_memory(memory)
+            else:
+                self.memories.append(memory)
+
+    def _set_active_agent(self, agent: BaseAgent):
+        self.active_agent = agent
+        if self.log is not None:
+            self.log.set_active_agent(agent.name)
+
+    def _log_key(self, key: str) -> Optional[str]:
+        """Key of the nth identical call in the current turn, under which its result is logged"""
+        if self.log is None:
+            return None
+        with self._lock:
+            self._occurrences[key] += 1
+            return make_key(self._turn, key, self._occurrences[key])
+
+    def _call(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a call once across concurrent callers, reusing a result logged by a resumed turn"""
+        log_key = self._log_key(key)
+        if log_key is not None and log_key in self.log.results:
+            return self.log.get_result(log_key)
+        result = self.flight.do(key, fn, *args, **kwargs)
+        if log_key is not None:
+            self.log.record_result(log_key, result)
+        return result
+
+    def _reset_budget(self):
+        self.hops = 0
+        self.tool_calls = 0
+        self._seen_calls.clear()
+        self._occurrences.clear()
+
+    def _check_call(self, agent: BaseAgent, func_name: str, params: Dict):
+        """Charge a call against the budget and stop on repeated identical calls"""
+        with self._lock:
+            self._charge_call(agent, func_name, params)
+
+    def _charge_call(self, agent: BaseAgent, func_name: str, params: Dict):
+        signature = call_signature(agent, func_name, params)
+        self._seen_calls[signature] += 1
+        if self._seen_calls[signature] > self.budget.max_repeats:
+            raise LoopDetected(
+                f"{agent.name} repeated {func_name}({params}) "
+                f"{self._seen_calls[signature]} times"
+            )
+        if func_name.startswith(TRANSFER_PREFIX):
+            self.hops += 1
+            if self.hops > self.budget.max_hops:
+                raise HopLimitExceeded(
+                    f"Exceeded {self.budget.max_hops} agent transfers"
+                )
+        else:
+            self.tool_calls += 1
+            if self.tool_calls > self.budget.max_tool_calls:
+                raise ToolCallLimitExceeded(
+                    f"Exceeded {self.budget.max_tool_calls} tool calls"
+                )
+
+    def _build_messages(self, agent: BaseAgent, user_input: str = None) -> List[Dict]:
+        """Build the prompt for an agent from the shared memories"""
+        if user_input is not None:
+            content = (
+                f"{user_input} + {agent.instructions} + The following is the hitorical "
+                f"conversation history(null if none): {str(self.memories)}"
+            )
+        elif agent is self.graph.entry:
+            content = (
+                f"The following is the hitorical conversation history: "
+                f"{str(self.memories)} + {agent.instructions}"
+            )
+        else:
+            agent_memory = [
+                mem for mem in self.memories if mem["content"].startswith(agent.name)
+            ]
+            content = str(agent_memory) + agent.instructions
+        return [{"role": "user", "content": content.strip()}]
+
+    def _send(self, agent: BaseAgent, messages: List[Dict]) -> AgentResponse:
+        key = make_key("llm", agent.name, getattr(agent, "model", None), messages)
+
+        def send() -> Dict[str, Any]:
+            response = agent.send_message(messages)
+            return {"text": response.text, "function_calls": response.function_calls}
+
+        return AgentResponse(**self._call(key, send))
+
+    def _start_tool(self, func: Callable, func_name: str, params: Dict) -> Future:
+        """Start a tool on its execution backend, reusing a logged, prefetched or in-flight result"""
+        key = tool_key(func_name, params)
+        log_key = self._log_key(key)
+        if log_key is not None and log_key in self.log.results:
+            future = Future()
+            future.set_result(self.log.get_result(log_key))
+            return future
+
+        future = self.prefetcher.take(key) if self.prefetcher is not None else None
+        if future is None:
+            future = self.flight.submit(
+                key, lambda: track_tool(func_name, lambda: self.runtime.submit(func, **params))
+            )
+        if self.log is not None:
+
+            def record(done: Future):
+                if done.exception() is None:
+                    self.log.record_result(log_key, done.result())
+
+            future.add_done_callback(record)
+        return future
+
+    def _finish_tool(self, agent: BaseAgent, func: Callable, func_name: str, params: Dict, future: Future):
+        """Wait for a started tool and record its result or error"""
+        try:
+            func_result = future.result(timeout=getattr(func, "execution_timeout", None))
+            self._log(
+                f"{agent.name} Finished the Function Result:{func_name} Finished. Result: {func_result}"
+            )
+            self._remember(
+                f"{agent.name} Finished the Function Call: {func_name}({params} with {func_result})"
+            )
+        except Exception as e:
+            error_msg = f"{agent.name} Error executing {func_name}: {str(e) or type(e).__name__}"
+            self._log(error_msg)
+            self._remember(error_msg)
+
+    def _dispatch(self, agent: BaseAgent, result: AgentResponse) -> List[BaseAgent]:
+        """Run the function calls of one response and return the agents it transfers to.
+
+        Each call waits for the calls before it, except that a run of
+        consecutive parallel-safe calls is started together and awaited as a
+        group. Tool calls after the first transfer are skipped, but further
+        transfers are kept so they can be fanned out.
+        """
+        node = self.graph.node(agent)
+        pending = []
+        targets: List[BaseAgent] = []
+        try:
+            for func_call in result.function_calls:
+                func_name = func_call["name"]
+                func_params = func_call.get("parameters") or {}
+                self._check_call(agent, func_name, func_params)
+                self._remember(
+                    f"{agent.name} Is Starting Function Call: {func_name}({func_params})"
+                )
+
+                target = node.transfers.get(func_name)
+                if target is not None:
+                    self._log(f"Transferring to {target.name}")
+                    self._remember(
+                        f"{target.name} is Transferring Function Call: {func_name}({func_params})"
+                    )
+                    if target not in targets:
+                        targets.append(target)
+                        self._prefetch(target, func_params)
+                    continue
+                if targets:
+                    # Calls after a transfer belong to the agent being left
+                    continue
+
+                func = node.tools.get(func_name)
+                if func is None:
+                    error_msg = f"{agent.name} Error executing {func_name}: unknown function"
+                    self._log(error_msg)
+                    self._remember(error_msg)
+                    continue
+                try:
+                    func_params = node.validators[func_name](func_params)
+                except ArgumentError as e:
+                    error_msg = f"{agent.name} Error executing {func_name}: {str(e)}"
+                    self._log(error_msg)
+                    self._remember(error_msg)
+                    continue
+                if pending and not (is_parallel_safe(func) and is_parallel_safe(pending[-1][0])):
+                    # Later calls may depend on earlier ones, e.g. install then run
+                    self._finish_tools(agent, pending)
+                future = self._start_tool(func, func_name, func_params)
+                pending.append((func, func_name, func_params, future))
+        finally:
+            # Record started tools even when the budget stops the session
+            self._finish_tools(agent, pending)
+        if targets and self.prefetcher is not None:
+            # Guesses the agent did not use by the time it hands over are wasted
+            self.prefetcher.discard(agent.name)
+        return targets
+
+    def _finish_tools(self, agent: BaseAgent, pending: List):
+        """Wait for started tools in call order and clear the list"""
+        for func, func_name, func_params, future in pending:
+            self._finish_tool(agent, func, func_name, func_params, future)
+        pending.clear()
+
+    def _prefetch(self, target: BaseAgent, params: Dict):
+        """Start the tool calls a transferred-to agent is predicted to make"""
+        task = params.get("task")
+        if self.prefetcher is None or target is self.graph.entry:
+            return
+        if not isinstance(task, str) or not task.strip():
+            return
+        node = self.graph.node(target)
+        self.prefetcher.start(target.name, node.tools, node.validators, task)
+
+    def _respond(self, agent: BaseAgent) -> AgentResponse:
+        """Ask an agent for its next response and record its text"""
+        result = self._send(agent, self._build_messages(agent))
+        self._log(result.text)
+        if result.text:
+            self._remember(f"{agent.name} Responded: {result.text}")
+        return result
+
+    def _run_branch(self, source: BaseAgent, agent: BaseAgent):
+        """Run one fanned-out agent until it transfers back to source or stops calling functions.
+
+        A branch that transfers to several agents fans out again and continues
+        once they return. Transfers made together with the transfer back to
+        source are not followed, since the branch ends there.
+        """
+        result = self._respond(agent)
+        while result.function_calls:
+            targets = self._dispatch(agent, result)
+            if source in targets:
+                for target in targets:
+                    if target is not source:
+                        self._reject_transfer(agent, target, source)
+                return
+            if len(targets) > 1:
+                self._fan_out(agent, targets)
+            elif targets:
+                agent = targets[0]
+            result = self._respond(agent)
+
+    def _reject_transfer(self, agent: BaseAgent, target: BaseAgent, source: BaseAgent):
+        error_msg = (
+            f"{agent.name} Error: transfer to {target.name} not followed because "
+            f"{agent.name} transferred back to {source.name} in the same response"
+        )
+        self._log(error_msg)
+        self._remember(error_msg)
+        if self.prefetcher is not None:
+            self.prefetcher.discard(target.name)
+
+    def _fan_out(self, source: BaseAgent, targets: List[BaseAgent]):
+        """Run several transferred-to agents concurrently and wait for all of them"""
+        self._log(f"Running {', '.join(target.name for target in targets)} in parallel")
+        # A dedicated pool, so branches never wait on the tool pool they submit to
+        with ThreadPoolExecutor(
+            max_workers=len(targets), thread_name_prefix="smart-team-branch"
+        ) as pool:
+            futures = [pool.submit(self._run_branch, source, target) for target in targets]
+        for future in futures:
+            future.result()
+
+    def run(self, user_input: str) -> str:
+        """Handle one user request and return the final text response"""
+        self._reset_budget()
+        if self.log is not None:
+            self._turn = self.log.begin_turn(user_input, self.active_agent.name)
+            # Resuming a turn rewinds the log to the agent that started it
+            if self.log.active_agent in self.graph.nodes:
+                self.active_agent = self.graph.nodes[self.log.active_agent].agent
+        agent = self.active_agent
+        result = self._send(agent, self._build_messages(agent, user_input))
+        self._log(result.text)
+        self._remember(user_input, role="user")
+        self._remember(result.text)
+
+        try:
+            while result.function_calls:
+                targets = self._dispatch(agent, result)
+                if len(targets) > 1:
+                    self._fan_out(agent, targets)
+                elif targets:
+                    agent = targets[0]
+                    self._set_active_agent(agent)
+                result = self._respond(agent)
+        except GraphError as e:
+            self._log(f"Stopping session: {e}")
+            self._remember(f"{agent.name} Stopped: {e}")
+            self._set_active_agent(self.graph.entry)
+            self._end_turn()
+            return f"Stopped: {e}"
+        finally:
+            if self.prefetcher is not None:
+                self.prefetcher.discard()
+
+        self._end_turn()
+        return result.text
+
+    def _end_turn(self):
+        if self.log is not None:
+            self.log.end_turn()
@@ -0,0 +1,277 @@
+"""
+Module: http_cache.py
+Purpose: On-disk HTTP cache for tool requests with freshness rules and conditional revalidation
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Status codes that may be stored (RFC 9110 section 15.1 heuristically cacheable codes)
+CACHEABLE_STATUS = {200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501}
+
+# Upper bound for heuristic freshness derived from Last-Modified
+MAX_HEURISTIC_FRESHNESS = 24 * 3600
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into a dict of lowercase directives"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, argument = part.partition("=")
+        directives[name.strip().lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str]) -> float:
+    """Seconds a stored response stays fresh (RFC 9111 section 4.2.1, private cache)"""
+    headers = CaseInsensitiveDict(headers)
+    cache_control = parse_cache_control(headers.get("Cache-Control"))
+    max_age = _int(cache_control.get("max-age"))
+    if max_age is not None:
+        return max_age
+
+    date = _parse_date(headers.get("Date"))
+    expires = headers.get("Expires")
+    if expires is not None:
+        expires_at = _parse_date(expires)
+        # Invalid Expires values such as "0" mean already expired
+        if expires_at is None or date is None:
+            return 0
+        return max(0.0, expires_at - date)
+
+    last_modified = _parse_date(headers.get("Last-Modified"))
+    if last_modified is not None and date is not None:
+        return min(MAX_HEURISTIC_FRESHNESS, max(0.0, (date - last_modified) / 10))
+    return 0
+
+
+class HTTPCache:
+    """GET requests through a requests.Session with responses cached on disk.
+
+    Fresh responses are served without a request. Stale responses that carry
+    an ETag or Last-Modified are revalidated with If-None-Match /
+    If-Modified-Since, and a 304 refreshes the stored copy instead of
+    downloading the body again. Responses with `no-store` are never stored,
+    `no-cache` responses are always revalidated, and responses with `Vary`
+are stored once per combination of the varied request header values.
+    Once the bodies exceed `max_bytes`, the least recently used entries are
+    removed.
+    """
+
+    def __init__(self, root: str = "http_cache", max_bytes: int = 100 * 1024 * 1024, session: Optional[requests.Session] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _vary_path(self, url: str) -> str:
+        key = hashlib.sha256(("GET " + url).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key + ".vary")
+
+    def _vary_names(self, url: str) -> List[str]:
+        """Request headers the last stored response for url varies on"""
+        try:
+            with open(self._vary_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _paths(self, url: str, headers: Dict[str, str]):
+        # Each combination of varied header values is stored as its own entry
+        names = self._vary_names(url)
+        variant = "".join(f"\n{name}: {headers.get(name)}" for name in names)
+        key = hashlib.sha256(("GET " + url + variant).encode("utf-8")).hexdigest()
+        base = os.path.join(self.root, key)
+        return base + ".json", base + ".body"
+
+    def _write(self, path: str, data: bytes):
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _load(self, url: str, headers: Dict[str, str]):
+        meta_path, body_path = self._paths(url, headers)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        os.utime(body_path)  # Mark as recently used
+        return meta, body
+
+    def _store(self, url: str, response: requests.Response, request_headers: Dict[str, str], request_time: float, body: bytes):
+        vary = sorted({name.strip().lower() for name in response.headers.get("Vary", "").split(",") if name.strip()})
+        if vary != self._vary_names(url):
+            self._write(self._vary_path(url), json.dumps(vary).encode("utf-8"))
+        meta_path, body_path = self._paths(url, request_headers)
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "request_time": request_time,
+            "response_time": time.time(),
+            "vary": {name: request_headers.get(name) for name in vary},
+        }
+        self._write(body_path, body)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _age(self, meta: Dict) -> float:
+        """Current age of a stored response (RFC 9111 section 4.2.3)"""
+        headers = CaseInsensitiveDict(meta["headers"])
+        date = _parse_date(headers.get("Date"))
+        apparent_age = max(0.0, meta["response_time"] - date) if date else 0.0
+        age_value = _int(headers.get("Age")) or 0
+        response_delay = meta["response_time"] - meta["request_time"]
+        corrected_initial_age = max(apparent_age, age_value + response_delay)
+        return corrected_initial_age + time.time() - meta["response_time"]
+
+    def _build_response(self, meta: Dict, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response._content = body
+        response.url = meta["url"]
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """Send a GET request, answering from the cache when allowed"""
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        request_directives = parse_cache_control(headers.get("cache-control"))
+        if "no-store" in request_directives:
+            return self.session.get(url, headers=headers, **kwargs)
+
+        meta, body = self._load(url, headers)
+        if meta is not None and any(
+            headers.get(name) != value for name, value in meta["vary"].items()
+        ):
+            meta = None
+
+        conditional = dict(headers)
+        if meta is not None:
+            stored = CaseInsensitiveDict(meta["headers"])
+            directives = parse_cache_control(stored.get("Cache-Control"))
+            fresh = self._age(meta) < freshness_lifetime(stored)
+            if fresh and "no-cache" not in directives and "no-cache" not in request_directives:
+                self.hits += 1
+                return self._build_response(meta, body)
+            if stored.get("ETag"):
+                conditional["if-none-match"] = stored["ETag"]
+            if stored.get("Last-Modified"):
+                conditional["if-modified-since"] = stored["Last-Modified"]
+
+        request_time = time.time()
+        response = self.session.get(url, headers=conditional, **kwargs)
+
+        if meta is not None and response.status_code == 304:
+            # Merge the new headers into the stored response and serve its body
+            self.revalidated += 1
+            merged = requests.Response()
+            merged.status_code = meta["status"]
+            merged.headers = CaseInsensitiveDict(meta["headers"])
+            merged.headers.update(response.headers)
+            if "Date" not in response.headers:
+                # The stored Date would make the refreshed copy look old again
+                merged.headers["Date"] = formatdate(usegmt=True)
+            self._store(url, merged, headers, request_time, body=body)
+            meta, body = self._load(url, headers)
+            return self._build_response(meta, body)
+
+        self.misses += 1
+        directives = parse_cache_control(response.headers.get("Cache-Control"))
+        if (
+            response.status_code in CACHEABLE_STATUS
+            and "no-store" not in directives
+            and response.headers.get("Vary", "").strip() != "*"
+        ):
+            if "Date" not in response.headers:
+                response.headers["Date"] = formatdate(request_time, usegmt=True)
+            self._store(url, response, headers, request_time, body=response.content)
+            self.evict()
+        response.from_cache = False
+        return response
+
+    def total_bytes(self) -> int:
+        return sum(
+            entry.stat().st_size
+            for entry in os.scandir(self.root)
+            if entry.name.endswith(".body")
+        )
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the bodies fit in max_bytes"""
+        removed = 0
+        with self._lock:
+            entries = [
+                (entry.stat(), entry.path)
+                for entry in os.scandir(self.root)
+                if entry.name.endswith(".body")
+            ]
+            total = sum(stat.st_size for stat, _ in entries)
+            for stat, path in sorted(entries, key=lambda item: item[0].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                for stale_path in (path, path[: -len(".body")] + ".json"):
+                    try:
+                        os.unlink(stale_path)
+                    except FileNotFoundError:
+                        pass
+                total -= stat.st_size
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+
+_default_cache: Optional[HTTPCache] = None
+_default_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Get the process-wide cache, configured by SMART_TEAM_HTTP_CACHE_DIR and SMART_TEAM_HTTP_CACHE_MAX_BYTES"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HTTPCache(
+                root=os.getenv("SMART_TEAM_HTTP_CACHE_DIR", "http_cache"),
+                max_bytes=int(os.getenv("SMART_TEAM_HTTP_CACHE_MAX_BYTES", 100 * 1024 * 1024)),
+            )
+        return _default_cache
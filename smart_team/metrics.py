@@ -0,0 +1,322 @@
+"""
+Module: metrics.py
+Purpose: In-process metrics for LLM usage, cost, latency and tool calls, with Prometheus and snapshot export
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# USD per million (input, output) tokens, matched by model name prefix
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4-1106-preview": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-opus": (15.00, 75.00),
+    "claude-3-haiku": (0.25, 1.25),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(_label_key(labels), 0)
+
+    def samples(self) -> Iterator[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield self.name, key, value
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[LabelKey, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    def get(self, **labels) -> Dict[str, float]:
+        entry = self.values.get(_label_key(labels))
+        if entry is None:
+            return {"count": 0, "sum": 0.0}
+        return {"count": entry[1], "sum": entry[2]}
+
+    def samples(self) -> Iterator[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            items = [(key, (list(e[0]), e[1], e[2])) for key, e in self.values.items()]
+        for key, (counts, count, total) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield self.name + "_bucket", key + (("le", repr(float(bound))),), bucket_count
+            yield self.name + "_bucket", key + (("le", "+Inf"),), count
+            yield self.name + "_count", key, count
+            yield self.name + "_sum", key, total
+
+
+class MetricsRegistry:
+    """Named collection of metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """All current values as a JSON-serializable dict"""
+        result = {"timestamp": time.time(), "metrics": {}}
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            series = []
+            for name, key, value in metric.samples():
+                series.append({"name": name, "labels": dict(key), "value": value})
+            result["metrics"][metric.name] = {"type": metric.kind, "series": series}
+        return result
+
+    def dump(self, path: str):
+        """Write a snapshot to a JSON file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp_path, path)
+
+    def start_http_server(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics in Prometheus text format from a background thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def start_snapshot_dumps(self, path: str, interval: float = 60.0) -> threading.Event:
+        """Dump a snapshot every `interval` seconds; set the returned event to stop"""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as e:
+                    print(f"Could not write metrics snapshot to {path}: {str(e)}")
+
+        threading.Thread(target=run, daemon=True).start()
+        return stop
+
+
+REGISTRY = MetricsRegistry()
+
+LLM_REQUESTS = REGISTRY.counter("smart_team_llm_requests_total", "LLM requests by agent, model and provider")
+LLM_ERRORS = REGISTRY.counter("smart_team_llm_errors_total", "Failed LLM requests by agent, model and provider")
+LLM_TOKENS = REGISTRY.counter("smart_team_llm_tokens_total", "LLM tokens by agent, model, provider and direction")
+LLM_COST = REGISTRY.counter("smart_team_llm_cost_usd_total", "Estimated LLM cost in USD by agent, model and provider")
+LLM_LATENCY = REGISTRY.histogram("smart_team_llm_request_seconds", "LLM request latency by provider and model")
+LLM_IN_FLIGHT = REGISTRY.gauge("smart_team_llm_in_flight", "LLM requests currently running by provider")
+TOOL_CALLS = REGISTRY.counter("smart_team_tool_calls_total", "Tool calls by tool")
+TOOL_ERRORS = REGISTRY.counter("smart_team_tool_errors_total", "Tool calls that raised or returned an error by tool")
+TOOL_LATENCY = REGISTRY.histogram("smart_team_tool_call_seconds", "Tool call latency by tool")
+TOOL_IN_FLIGHT = REGISTRY.gauge("smart_team_tool_in_flight", "Tool calls currently running by tool")
+QUEUE_DEPTH = REGISTRY.gauge("smart_team_queue_depth", "Requests waiting in a local queue")
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimate the USD cost of a request from MODEL_PRICES; unknown models cost 0"""
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(prefix):
+            input_price, output_price = MODEL_PRICES[prefix]
+            return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+class LLMCall:
+    """Collects the token usage of one LLM request inside `track_llm`"""
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def usage(self, input_tokens: Optional[int], output_tokens: Optional[int]):
+        self.input_tokens = input_tokens or 0
+        self.output_tokens = output_tokens or 0
+
+
+@contextmanager
+def track_llm(provider: str, agent: str, model: str):
+    """Record count, latency, tokens, cost and errors of one LLM request"""
+    labels = {"agent": agent, "model": model, "provider": provider}
+    call = LLMCall()
+    LLM_IN_FLIGHT.inc(provider=provider)
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        LLM_ERRORS.inc(**labels)
+        raise
+    finally:
+        LLM_IN_FLIGHT.dec(provider=provider)
+        LLM_LATENCY.observe(time.perf_counter() - start, provider=provider, model=model)
+        LLM_REQUESTS.inc(**labels)
+        LLM_TOKENS.inc(call.input_tokens, direction="input", **labels)
+        LLM_TOKENS.inc(call.output_tokens, direction="output", **labels)
+        LLM_COST.inc(estimate_cost(model, call.input_tokens, call.output_tokens), **labels)
+
+
+# Tools that catch their own failures report them as strings with these prefixes
+ERROR_PREFIXES = ("error", "unexpected error")
+
+
+def is_error_result(result: Any) -> bool:
+    """Whether a tool reported a failure in its return value, e.g. "Error: ..." or (False, message)"""
+    if isinstance(result, (tuple, list)) and result and result[0] is False:
+        return True
+    return isinstance(result, str) and result.lstrip().lower().startswith(ERROR_PREFIXES)
+
+
+def track_tool(tool: str, start: Callable[[], Future]) -> Future:
+    """Record calls, latency, errors and in-flight count of a tool call started by `start`.
+
+    Metrics are recorded by the caller when the returned future completes, so
+    tools running in a process pool or subprocess are counted here too.
+    """
+    TOOL_IN_FLIGHT.inc(tool=tool)
+    TOOL_CALLS.inc(tool=tool)
+    began = time.perf_counter()
+
+    def finished(done: Future):
+        TOOL_IN_FLIGHT.dec(tool=tool)
+        TOOL_LATENCY.observe(time.perf_counter() - began, tool=tool)
+        if done.cancelled() or done.exception() is not None or is_error_result(done.result()):
+            TOOL_ERRORS.inc(tool=tool)
+
+    try:
+        future = start()
+    except BaseException:
+        TOOL_IN_FLIGHT.dec(tool=tool)
+        TOOL_ERRORS.inc(tool=tool)
+        raise
+    future.add_done_callback(finished)
+    return future
@@ -0,0 +1,134 @@
+"""
+Module: prefetch.py
+Purpose: Speculatively start an agent's likely tool call from the task it is transferred with
+"""
+
+from __future__ import annotations
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .executors import INLINE, THREAD, ToolRuntime, get_backend
+from .metrics import REGISTRY, track_tool
+from .singleflight import SingleFlight, default_flight, make_key
+from .validation import ToolValidator
+
+PREFETCHES = REGISTRY.counter(
+    "smart_team_prefetch_total", "Speculative tool calls by tool and outcome (started, hit, wasted)"
+)
+
+
+def speculative(predict: Callable[[str], Optional[Dict]]) -> Callable:
+    """Allow a tool to be started before the agent asks for it.
+
+    Args:
+        predict (Callable[[str], Optional[Dict]]): Maps the `task` an agent is
+            transferred with to the arguments the agent will most likely call
+            the tool with, or None when no guess can be made.
+
+    Only mark tools without side effects: a guess that the agent does not
+    confirm is thrown away, but the tool has still run.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        func.prefetch = predict
+        return func
+
+    return decorator
+
+
+def tool_key(func_name: str, params: Dict) -> str:
+    """Key shared by real and speculative calls of a tool"""
+    return make_key("tool", func_name, params)
+
+
+class Prefetcher:
+    """Holds the speculative calls started for agents that were just transferred to.
+
+    A speculative call is used when the agent makes the same call (after
+    argument validation and defaults), and counted as wasted when the agent
+    moves on without making it. Speculative calls go through the same
+    SingleFlight group as real calls, so an identical call running in another
+    session is joined instead of run twice. Wasted calls are not cancelled,
+    since another session may be waiting on the same flight.
+    """
+
+    def __init__(self, runtime: ToolRuntime, flight: Optional[SingleFlight] = None):
+        self.runtime = runtime
+        self.flight = flight or default_flight
+        self.started = 0
+        self.hits = 0
+        self.wasted = 0
+        self._calls: Dict[str, Tuple[str, str, Future]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, agent_name: str, tools: Dict[str, Callable], validators: Dict[str, ToolValidator], task: str) -> List[str]:
+        """Start the predicted calls of every speculative tool of an agent"""
+        started = []
+        for func_name, func in tools.items():
+            predict = getattr(func, "prefetch", None)
+            if predict is None:
+                continue
+            try:
+                params = predict(task)
+                if params is None:
+                    continue
+                params = validators[func_name](params)
+            except Exception:
+                # A failed guess only means nothing is prefetched
+                continue
+
+            key = tool_key(func_name, params)
+            with self._lock:
+                if key in self._calls:
+                    continue
+                # Speculation only helps if it runs alongside the agent's LLM call
+                backend = THREAD if get_backend(func) == INLINE else None
+                future = self.flight.submit(
+                    key,
+                    lambda func=func, func_name=func_name, backend=backend, params=params: track_tool(
+                        func_name, lambda: self.runtime.submit(func, backend=backend, **params)
+                    ),
+                )
+                self._calls[key] = (agent_name, func_name, future)
+                self.started += 1
+            PREFETCHES.inc(tool=func_name, outcome="started")
+            started.append(key)
+        return started
+
+    def take(self, key: str) -> Optional[Future]:
+        """Claim a speculative call that matches a real call"""
+        with self._lock:
+            entry = self._calls.pop(key, None)
+            if entry is None:
+                return None
+            self.hits += 1
+        PREFETCHES.inc(tool=entry[1], outcome="hit")
+        return entry[2]
+
+    def discard(self, agent_name: Optional[str] = None) -> int:
+        """Forget unclaimed calls of one agent (or all agents) and count them as wasted"""
+        with self._lock:
+            keys = [
+                key
+                for key, (owner, _, _) in self._calls.items()
+                if agent_name is None or owner == agent_name
+            ]
+            entries = [self._calls.pop(key) for key in keys]
+            self.wasted += len(entries)
+        for _, func_name, _ in entries:
+            PREFETCHES.inc(tool=func_name, outcome="wasted")
+        return len(entries)
+
+    def hit_rate(self) -> float:
+        """Fraction of resolved speculative calls that were used"""
+        resolved = self.hits + self.wasted
+        return self.hits / resolved if resolved else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "hit_rate": self.hit_rate(),
+        }
@@ -0,0 +1,33 @@
+"""Search backends for the Smart Team Framework.
+
+This module provides:
+- SearchBackend: Abstract base class for search backends
+- BM25Index: Incremental inverted index over fetched pages
+- LocalIndexBackend: Answers queries from the local index
+- TieredSearchBackend: Local index first, another backend as fallback
+- NearDuplicateFilter: Drops near-duplicate pages using SimHash signatures
+
+The web backend lives in smart_team.search.web so the local backends work
+without the scraping dependencies installed.
+"""
+
+from smart_team.search.index import BM25Index, tokenize
+from smart_team.search.dedup import NearDuplicateFilter, remove_repeated_paragraphs, simhash
+from smart_team.search.backends import (
+    Page,
+    SearchBackend,
+    LocalIndexBackend,
+    TieredSearchBackend,
+)
+
+__all__ = [
+    "BM25Index",
+    "tokenize",
+    "NearDuplicateFilter",
+    "remove_repeated_paragraphs",
+    "simhash",
+    "Page",
+    "SearchBackend",
+    "LocalIndexBackend",
+    "TieredSearchBackend",
+]
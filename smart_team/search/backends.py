@@ -0,0 +1,135 @@
+"""
+Module: backends.py
+Purpose: Search backend interface and the local-index and tiered backends
+"""
+
+from __future__ import annotations
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from .dedup import NearDuplicateFilter
+from .index import BM25Index
+
+
+@dataclass
+class Page:
+    """A fetched page and the text extracted from it"""
+
+    url: str
+    content: str
+    fetched_at: float = field(default_factory=time.time)
+    source: str = "web"
+    score: Optional[float] = None
+
+
+class SearchBackend(ABC):
+    """Base class for everything that can answer a search query with pages"""
+
+    @abstractmethod
+    def search(self, query: str, num_results: int, **kwargs) -> List[Page]:
+        """Return up to num_results pages for the query"""
+        pass
+
+
+class LocalIndexBackend(SearchBackend):
+    """Answers queries from a BM25 index of previously fetched pages.
+
+    A page only counts as a hit when its score is at least `min_score`, it
+    matches at least `min_coverage` of the query terms and it was fetched less
+    than `max_age` seconds ago.
+    """
+
+    def __init__(
+        self,
+        index: BM25Index,
+        min_score: float = 0.0,
+        min_coverage: float = 0.6,
+        max_age: float = 7 * 24 * 3600,
+    ):
+        self.index = index
+        self.min_score = min_score
+        self.min_coverage = min_coverage
+        self.max_age = max_age
+
+    def search(
+        self,
+        query: str,
+        num_results: int,
+        dedup: Optional[NearDuplicateFilter] = None,
+        exclude: Iterable[str] = (),
+        **kwargs,
+    ) -> List[Page]:
+        now = time.time()
+        exclude = set(exclude)
+        pages = []
+        for url, score, coverage in self.index.search(query, limit=(num_results + len(exclude)) * 3):
+            if url in exclude or score < self.min_score or coverage < self.min_coverage:
+                continue
+            document = self.index.get(url)
+            if document is None or now - document["fetched_at"] > self.max_age:
+                continue
+            page = Page(
+                url=url,
+                content=document["content"],
+                fetched_at=document["fetched_at"],
+                source="local",
+                score=score,
+            )
+            if dedup is not None and not dedup.accept(page):
+                continue
+            pages.append(page)
+            if len(pages) >= num_results:
+                break
+        return pages
+
+    def add(self, page: Page):
+        """Index a fetched page"""
+        self.index.add(page.url, page.content, page.fetched_at)
+
+
+class TieredSearchBackend(SearchBackend):
+    """Tries the local index first and falls back to another backend for the rest.
+
+    Pages returned by the fallback are added to the local index, so the index
+    grows with every search (and is persisted page by page when it has a path).
+
+    With `deduplicate` on, near-duplicate pages are skipped in both tiers and
+    the next candidate is used instead, so mirrors do not use up num_results.
+    """
+
+    def __init__(
+        self,
+        local: LocalIndexBackend,
+        fallback: Optional[SearchBackend] = None,
+        deduplicate: bool = True,
+        max_distance: int = 3,
+    ):
+        self.local = local
+        self.fallback = fallback
+        self.deduplicate = deduplicate
+        self.max_distance = max_distance
+        self.duplicates_dropped = 0
+        self.local_hits = 0
+        self.fallbacks = 0
+
+    def search(self, query: str, num_results: int, exclude: Iterable[str] = (), **kwargs) -> List[Page]:
+        dedup = NearDuplicateFilter(self.max_distance) if self.deduplicate else None
+        try:
+            pages = self.local.search(query, num_results, dedup=dedup, exclude=exclude)
+            if len(pages) >= num_results or self.fallback is None:
+                self.local_hits += 1
+                return pages
+
+            self.fallbacks += 1
+            seen = set(exclude) | {page.url for page in pages}
+            fetched = self.fallback.search(
+                query, num_results - len(pages), exclude=seen, dedup=dedup, **kwargs
+            )
+        finally:
+            if dedup is not None:
+                self.duplicates_dropped += dedup.dropped
+        for page in fetched:
+            self.local.add(page)
+        return pages + [page for page in fetched if page.url not in seen]
@@ -0,0 +1,100 @@
+"""
+Module: dedup.py
+Purpose: Drop near-duplicate pages and repeated boilerplate paragraphs from search results
+"""
+
+from __future__ import annotations
+import hashlib
+import re
+from typing import TYPE_CHECKING, List, Optional, Set
+
+if TYPE_CHECKING:
+    from .backends import Page
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of the word shingles in a text"""
+    words = _normalize(text)
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [
+            " ".join(words[i : i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        value = _hash64(shingle)
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateFilter:
+    """Remembers the pages accepted for one search and rejects near-duplicates.
+
+    A page is a near-duplicate when the SimHash of its text is within
+    `max_distance` bits of a page accepted before it, which catches mirrors
+    and syndicated copies that differ only in navigation, dates or ads.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.signatures: List[int] = []
+        self.dropped = 0
+
+    def accept(self, page: "Page") -> bool:
+        """Return True and remember the page unless it is a near-duplicate"""
+        if not _normalize(page.content):
+            return True
+        signature = simhash(page.content)
+        if any(
+            hamming_distance(signature, seen) <= self.max_distance
+            for seen in self.signatures
+        ):
+            self.dropped += 1
+            return False
+        self.signatures.append(signature)
+        return True
+
+
+def remove_repeated_paragraphs(contents: List[str], seen: Optional[Set[str]] = None) -> List[str]:
+    """Drop paragraphs that already appeared earlier in the same or a previous page.
+
+    Args:
+        contents (List[str]): Page texts with one paragraph per line.
+        seen (Optional[Set[str]]): Paragraphs of earlier batches; pass the same set to
+            clean pages fetched in several batches. It is updated in place.
+
+    Returns:
+        List[str]: The page texts with repeated paragraphs (cookie notices, bylines, newsletter prompts) removed.
+    """
+    seen = set() if seen is None else seen
+    cleaned = []
+    for content in contents:
+        paragraphs = []
+        for paragraph in content.split("\n"):
+            key = " ".join(_normalize(paragraph))
+            if not key:
+                continue
+            if key in seen:
+                continue
+            seen.add(key)
+            paragraphs.append(paragraph)
+        cleaned.append("\n".join(paragraphs))
+    return cleaned
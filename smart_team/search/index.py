@@ -0,0 +1,207 @@
+"""
+Module: index.py
+Purpose: Incremental inverted index with BM25 ranking over fetched pages
+"""
+
+from __future__ import annotations
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words"""
+    return [
+        token
+        for token in _TOKEN_RE.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+class BM25Index:
+    """Inverted index over documents keyed by URL, ranked with Okapi BM25.
+
+    Documents can be added at any time; adding a URL that is already indexed
+    replaces the old version. When `path` is given the index is loaded from
+    that JSON-lines journal and every add or remove appends one line to it, so
+    persisting a page costs the size of the page rather than of the index.
+    Once most lines of the journal are outdated it is compacted with `save`.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.documents: Dict[str, Dict] = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_entries = 0
+        if path:
+            if os.path.exists(path):
+                self.load()
+            self._open_journal()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.documents
+
+    def _open_journal(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._journal = open(self.path, "a", encoding="utf-8")
+
+    def _append(self, entry: Dict):
+        """Append one change to the journal, compacting it once it is mostly outdated"""
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        self._journal_entries += 1
+        if self._journal_entries > 2 * len(self.documents) + 100:
+            self.save()
+
+    def add(self, url: str, content: str, fetched_at: Optional[float] = None):
+        """Index a page, replacing any earlier version of the same URL"""
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        with self._lock:
+            self._add(url, content, fetched_at)
+            self._append({"url": url, "content": content, "fetched_at": fetched_at})
+
+    def _add(self, url: str, content: str, fetched_at: float):
+        counts = Counter(tokenize(content))
+        with self._lock:
+            self._remove(url)
+            for term, count in counts.items():
+                self.postings.setdefault(term, {})[url] = count
+            length = sum(counts.values())
+            self.documents[url] = {
+                "content": content,
+                "length": length,
+                "fetched_at": fetched_at,
+            }
+            self.total_length += length
+
+    def remove(self, url: str):
+        """Remove a page from the index"""
+        with self._lock:
+            if self._remove(url):
+                self._append({"url": url, "removed": True})
+
+    def _remove(self, url: str) -> bool:
+        with self._lock:
+            document = self.documents.pop(url, None)
+            if document is None:
+                return False
+            self.total_length -= document["length"]
+            for term in set(tokenize(document["content"])):
+                docs = self.postings.get(term)
+                if docs is not None:
+                    docs.pop(url, None)
+                    if not docs:
+                        del self.postings[term]
+            return True
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Get the stored content and fetch time of a page"""
+        return self.documents.get(url)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float, float]]:
+        """Rank documents for a query.
+
+        Returns:
+            List[Tuple[str, float, float]]: (url, BM25 score, fraction of query terms matched)
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            count = len(self.documents)
+            if count == 0:
+                return []
+            avg_length = self.total_length / count
+            scores: Dict[str, float] = {}
+            matched: Counter = Counter()
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                for url, freq in docs.items():
+                    length = self.documents[url]["length"]
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[url] = scores.get(url, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+                    matched[url] += 1
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(url, score, matched[url] / len(terms)) for url, score in ranked]
+
+    def save(self, path: Optional[str] = None):
+        """Write one line per current document, compacting the journal when saving to it.
+
+        Postings are not stored; they are rebuilt on load.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given to save the index to")
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Holding the lock keeps adds from landing in a journal that is being replaced
+        with self._lock:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".index-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    for url, doc in self.documents.items():
+                        entry = {"url": url, "content": doc["content"], "fetched_at": doc["fetched_at"]}
+                        f.write(json.dumps(entry) + "\n")
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+            if path == self.path and self._journal is not None:
+                self._journal.close()
+                self._open_journal()
+                self._journal_entries = len(self.documents)
+
+    def load(self, path: Optional[str] = None):
+        """Load documents from a journal written by this index, skipping a torn last line"""
+        path = path or self.path
+        entries = 0
+        with self._lock, open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("removed"):
+                    self._remove(entry["url"])
+                else:
+                    self._add(entry["url"], entry["content"], entry["fetched_at"])
+                entries += 1
+            if path == self.path:
+                self._journal_entries = entries
+
+    def close(self):
+        """Close the journal file"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
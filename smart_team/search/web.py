@@ -0,0 +1,106 @@
+"""
+Module: web.py
+Purpose: Search backend that runs a Google search and scrapes the result pages
+"""
+
+from __future__ import annotations
+import zlib
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+from googlesearch import search
+
+from ..executors import PROCESS, get_runtime
+from ..http_cache import get_http_cache
+from .backends import Page, SearchBackend
+from .dedup import NearDuplicateFilter
+
+# Browser user-agent strings, one is picked per host
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 11_2_3) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0.3 Safari/605.1.15",
+]
+
+
+def user_agent_for(url: str) -> str:
+    """Pick a browser user agent that stays the same for every page of a host.
+
+    A stable value per host lets the HTTP cache reuse responses that carry
+    `Vary: User-Agent`.
+    """
+    host = urlsplit(url).netloc.lower()
+    return USER_AGENTS[zlib.crc32(host.encode("utf-8")) % len(USER_AGENTS)]
+
+
+def extract_paragraphs(html: str) -> List[str]:
+    """Extract the text of the <p> tags in a page"""
+    soup = BeautifulSoup(html, "html.parser")
+    return [para.get_text().strip() for para in soup.find_all("p")]
+
+
+class WebSearchBackend(SearchBackend):
+    """Google search followed by fetching each result page"""
+
+    def __init__(self, extra_urls: int = 5, timeout: float = 10):
+        self.extra_urls = extra_urls
+        self.timeout = timeout
+
+    def search_urls(self, query: str, count: int) -> Iterable[str]:
+        return search(query, num_results=count)
+
+    def fetch(self, url: str, headers: Dict[str, str]) -> Optional[Page]:
+        """Fetch one page and extract its text, or return None on failure"""
+        try:
+            response = get_http_cache().get(url, headers=headers, timeout=self.timeout)
+            if response.status_code != 200:
+                print(
+                    "Failed to retrieve content from "
+                    + url
+                    + " (Status Code: "
+                    + str(response.status_code)
+                    + ")"
+                )
+                return None
+            # HTML parsing is CPU-bound, so it runs in the process pool
+            paragraphs = get_runtime().call(extract_paragraphs, response.text, backend=PROCESS)
+            content = "\n".join(paragraphs)
+            return Page(url=url, content=content)
+        except Exception as e:
+            print("An error occurred while retrieving " + url + ": " + str(e))
+            return None
+
+    def search(
+        self,
+        query: str,
+        num_results: int,
+        use_random_user_agent: bool = True,
+        exclude: Iterable[str] = (),
+        dedup: Optional[NearDuplicateFilter] = None,
+        **kwargs,
+    ) -> List[Page]:
+        exclude = set(exclude)
+        pages = []
+        # Fetch additional URLs to ensure we get valid results
+        for url in self.search_urls(query, num_results + len(exclude) + self.extra_urls):
+            if len(pages) >= num_results:
+                break
+            if url in exclude:
+                continue
+
+            headers = {}
+            if use_random_user_agent:
+                headers["User-Agent"] = user_agent_for(url)
+
+            page = self.fetch(url, headers)
+            if page is None:
+                continue
+            # Skip mirrors of pages already accepted and move on to the next URL
+            if dedup is not None and not dedup.accept(page):
+                print("Skipping near-duplicate page " + url)
+                continue
+            pages.append(page)
+        return pages
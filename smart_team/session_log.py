@@ -0,0 +1,251 @@
+"""
+Module: session_log.py
+Purpose: Append-only session log with snapshots so a session can be resumed after a restart
+"""
+
+from __future__ import annotations
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # Fall back to JSON records when msgpack is not installed
+    msgpack = None
+
+MAGIC = b"STLOG1"
+_CODECS = {b"m": "msgpack", b"j": "json"}
+_LENGTH = struct.Struct(">I")
+_HEADER_SIZE = len(MAGIC) + 1
+
+# Record types
+MEMORY = "m"
+RESULT = "r"
+ACTIVE_AGENT = "a"
+TURN = "u"
+
+
+def _pack(obj: Any, codec: str) -> bytes:
+    if codec == "msgpack":
+        return msgpack.packb(obj, use_bin_type=True, default=str)
+    return json.dumps(obj, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def _unpack(data: bytes, codec: str) -> Any:
+    if codec == "msgpack":
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data.decode("utf-8"))
+
+
+def _codec_byte(codec: str) -> bytes:
+    return next(byte for byte, name in _CODECS.items() if name == codec)
+
+
+def _read_header(data: bytes, path: str) -> str:
+    if data[: len(MAGIC)] != MAGIC or data[len(MAGIC) : _HEADER_SIZE] not in _CODECS:
+        raise ValueError(f"{path} is not a session log")
+    codec = _CODECS[data[len(MAGIC) : _HEADER_SIZE]]
+    if codec == "msgpack" and msgpack is None:
+        raise ValueError(f"{path} was written with msgpack, which is not installed")
+    return codec
+
+
+class SessionLog:
+    """Append-only log of a session's memories and completed call results.
+
+    Each user request is a turn. Call results are only kept for the current
+    turn: if the process stops before a turn ends, `begin_turn` with the same
+    input rewinds the memories to where the turn started and the results are
+    replayed, while a new turn starts with no results.
+
+    Every change is appended as a length-prefixed record (msgpack when it is
+    installed, JSON otherwise). Every `snapshot_every` records the full state is
+    written to `<path>.snap` together with the log offset it covers, so
+    reopening a log loads the snapshot and replays at most `snapshot_every`
+    records. Records are read through a memory map, so large logs are not
+    copied into memory to be scanned.
+    """
+
+    def __init__(self, path: str, snapshot_every: int = 100, fsync: bool = False):
+        self.path = path
+        self.snapshot_path = path + ".snap"
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.memories: List[Dict[str, Any]] = []
+        self.results: Dict[str, Any] = {}
+        self.active_agent: Optional[str] = None
+        self.turn: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._since_snapshot = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                self.codec = _read_header(f.read(_HEADER_SIZE), path)
+            end = self._restore()
+            # Drop a record torn by a crash so new records start on a boundary
+            if end < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+        else:
+            self.codec = "msgpack" if msgpack is not None else "json"
+            # A snapshot left from an earlier log at this path does not describe this one
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+            with open(path, "wb") as f:
+                f.write(MAGIC + _codec_byte(self.codec))
+
+        self._file = open(path, "ab")
+
+    def iter_records(self, offset: int = _HEADER_SIZE) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (end offset, record) for every complete record from `offset` on"""
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= offset:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                position = offset
+                while position + _LENGTH.size <= size:
+                    (length,) = _LENGTH.unpack_from(data, position)
+                    end = position + _LENGTH.size + length
+                    if end > size:
+                        break
+                    record = _unpack(data[position + _LENGTH.size : end], self.codec)
+                    yield end, record
+                    position = end
+
+    def _apply(self, record: Dict[str, Any]):
+        kind = record.get("t")
+        if kind == MEMORY:
+            self.memories.append(record["v"])
+        elif kind == RESULT:
+            self.results[record["k"]] = record["v"]
+        elif kind == ACTIVE_AGENT:
+            self.active_agent = record["v"]
+        elif kind == TURN:
+            turn = record["v"]
+            if turn["done"] or self.turn is None or self.turn["id"] != turn["id"]:
+                # Results are only replayed while the turn that produced them is resumed
+                self.results = {}
+            else:
+                # Resuming: replay the turn from the state it started in
+                del self.memories[turn["start"] :]
+                self.active_agent = turn["agent"]
+            self.turn = turn
+
+    def _restore(self) -> int:
+        """Load the latest snapshot and replay the records written after it"""
+        offset = _HEADER_SIZE
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            self.memories = snapshot["memories"]
+            self.results = snapshot["results"]
+            self.active_agent = snapshot["active_agent"]
+            self.turn = snapshot.get("turn")
+            offset = snapshot["offset"]
+
+        for offset, record in self.iter_records(offset):
+            self._apply(record)
+            self._since_snapshot += 1
+        return offset
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Load the snapshot unless it covers more of the log than exists"""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path, "rb") as f:
+            data = f.read()
+        snapshot = _unpack(data[_HEADER_SIZE:], _read_header(data, self.snapshot_path))
+        if snapshot["offset"] > os.path.getsize(self.path):
+            # Written for a log that was replaced; replay the log from the start
+            return None
+        return snapshot
+
+    def _append(self, record: Dict[str, Any]):
+        payload = _pack(record, self.codec)
+        with self._lock:
+            self._file.write(_LENGTH.pack(len(payload)) + payload)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._apply(record)
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.snapshot_every:
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        snapshot = {
+            "offset": self._file.tell(),
+            "memories": self.memories,
+            "results": self.results,
+            "active_agent": self.active_agent,
+            "turn": self.turn,
+        }
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC + _codec_byte(self.codec) + _pack(snapshot, self.codec))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self._since_snapshot = 0
+
+    def append_memory(self, memory: Dict[str, Any]):
+        """Record a conversation memory"""
+        self._append({"t": MEMORY, "v": memory})
+
+    def record_result(self, key: str, value: Any):
+        """Record the result of a completed LLM request or tool call"""
+        self._append({"t": RESULT, "k": key, "v": value})
+
+    def set_active_agent(self, name: str):
+        """Record which agent holds control"""
+        if name != self.active_agent:
+            self._append({"t": ACTIVE_AGENT, "v": name})
+
+    def begin_turn(self, user_input: str, agent_name: str) -> int:
+        """Start a turn for a user request, or resume the unfinished turn for the same request"""
+        turn = self.turn
+        if turn is not None and not turn["done"] and turn["input"] == user_input:
+            self._append({"t": TURN, "v": turn})
+            return turn["id"]
+        turn = {
+            "id": turn["id"] + 1 if turn is not None else 1,
+            "input": user_input,
+            "start": len(self.memories),
+            "agent": agent_name,
+            "done": False,
+        }
+        self._append({"t": TURN, "v": turn})
+        return turn["id"]
+
+    def end_turn(self):
+        """Mark the current turn as finished and drop its results"""
+        if self.turn is not None and not self.turn["done"]:
+            self._append({"t": TURN, "v": dict(self.turn, done=True)})
+
+    def get_result(self, key: str, default: Any = None) -> Any:
+        """Get a previously recorded result"""
+        return self.results.get(key, default)
+
+    def snapshot(self):
+        """Write a snapshot now"""
+        with self._lock:
+            self._write_snapshot()
+
+    def close(self):
+        """Flush and close the log file"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
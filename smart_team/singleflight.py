@@ -0,0 +1,140 @@
+"""
+Module: singleflight.py
+Purpose: Coalesce identical in-flight calls so concurrent callers share one result
+"""
+
+from __future__ import annotations
+import asyncio
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable key from call parts such as a name and its arguments"""
+    try:
+        return json.dumps(parts, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return repr(parts)
+
+
+class SingleFlight:
+    """Run at most one call per key at a time.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive with the same key while it is still running wait for the leader and
+    receive the same result or exception. Once the call finishes the key is
+    released, so nothing is cached beyond the lifetime of the call.
+
+    Works across threads (`do`) and asyncio tasks (`do_async`), and the two can
+    be mixed: a thread can wait on a call led by a task and vice versa.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return the future for a key and whether the caller is its leader"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.calls += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn(*args, **kwargs) unless an identical call is already running"""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Async version of `do`; fn may be a coroutine function or a plain callable"""
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def submit(self, key: Hashable, start: Callable[[], Future]) -> Future:
+        """Future-based version of `do` for calls that run in the background.
+
+        `start` is only called by the leader and must return a future; callers
+        with the same key get a future that completes with the same result.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future
+        try:
+            inner = start()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            return future
+
+        def done(inner_future: Future):
+            error = inner_future.exception()
+            if error is not None:
+                self._finish(key, future, error=error)
+            else:
+                self._finish(key, future, inner_future.result())
+
+        inner.add_done_callback(done)
+        return future
+
+    def wrap(self, fn: Callable) -> Callable:
+        """Wrap a function so identical concurrent calls are coalesced"""
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return self.do(make_key(fn.__name__, args, kwargs), fn, *args, **kwargs)
+
+        return wrapper
+
+    def in_flight(self) -> int:
+        """Number of calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of executed calls, coalesced callers and calls still running"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+# Shared by every session in the process so identical calls coalesce across them
+default_flight = SingleFlight()
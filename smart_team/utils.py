@@ -1,6 +1,13 @@
-from typing import Callable, Dict, List, Union
+from typing import Any, Callable, Dict, List, Union, get_type_hints
+from typing_extensions import Literal, get_args, get_origin
 from enum import Enum
 import inspect
+import re
+
+try:
+    from types import UnionType  # Python 3.10+ `int | str`
+except ImportError:
+    UnionType = Union
 
 
 class SchemaFormat(Enum):
@@ -13,90 +20,148 @@ class SchemaFormat(Enum):
     BASELINE = "baseline"
 
 
-def _get_type(annotation: type) -> str:
-    """Convert Python type to JSON schema type"""
-    if annotation == inspect.Parameter.empty:
-        return "string"
-    elif annotation in (int, float):
-        return "number"
-    elif annotation == bool:
-        return "boolean"
-    elif annotation == str:
-        return "string"
-    elif annotation == list:
-        return "array"
-    return "string"
+_PRIMITIVE_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    tuple: "array",
+    dict: "object",
+    type(None): "null",
+}
+
+_PARAM_LINE = re.compile(r"^\s*\*{0,2}(\w+)\s*(?:\(([^)]*)\))?\s*:\s*(.*)$")
+
+
+def _type_schema(annotation: Any) -> Dict:
+    """Convert a Python type hint to a JSON schema"""
+    if annotation in (inspect.Parameter.empty, Any):
+        return {"type": "string"}
+    if annotation in _PRIMITIVE_TYPES:
+        return {"type": _PRIMITIVE_TYPES[annotation]}
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Literal:
+        schema = {"enum": list(args)}
+        types = {_PRIMITIVE_TYPES.get(type(arg)) for arg in args}
+        if len(types) == 1 and None not in types:
+            schema["type"] = types.pop()
+        return schema
+    if origin in (Union, UnionType):
+        members = [arg for arg in args if arg is not type(None)]
+        if len(members) == 1:
+            return _type_schema(members[0])
+        schemas = [_type_schema(arg) for arg in members]
+        if all(set(schema) == {"type"} for schema in schemas):
+            return {"type": list(dict.fromkeys(schema["type"] for schema in schemas))}
+        return {"anyOf": schemas}
+    if origin is tuple and args and not (len(args) == 2 and args[1] is Ellipsis):
+        # Fixed-length tuple such as Tuple[int, str]: one schema per position
+        items = [] if args == ((),) else [_type_schema(arg) for arg in args]
+        return {
+            "type": "array",
+            "prefixItems": items,
+            "items": False,
+            "minItems": len(items),
+            "maxItems": len(items),
+        }
+    if origin in (list, tuple, set, frozenset):
+        schema = {"type": "array"}
+        if args:
+            schema["items"] = _type_schema(args[0])
+        return schema
+    if origin is dict:
+        schema = {"type": "object"}
+        if len(args) == 2:
+            schema["additionalProperties"] = _type_schema(args[1])
+        return schema
+    return {"type": "string"}
+
+
+def _parse_param_docs(doc: str) -> Dict[str, str]:
+    """Read parameter descriptions from the Args/Parameters section of a docstring"""
+    descriptions: Dict[str, str] = {}
+    in_section = False
+    section_indent = 0
+    current = None
+    for line in doc.splitlines():
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if stripped.rstrip(":").lower() in ("args", "arguments", "parameters", "params"):
+            in_section, section_indent, current = True, indent, None
+            continue
+        if not in_section:
+            continue
+        if not stripped:
+            current = None
+            continue
+        if indent <= section_indent and stripped.endswith(":"):
+            # Next section such as Returns:
+            in_section = False
+            continue
+        match = _PARAM_LINE.match(line)
+        if match and (current is None or indent <= current[1]):
+            current = (match.group(1), indent)
+            descriptions[match.group(1)] = match.group(3).strip()
+        elif current is not None:
+            descriptions[current[0]] += " " + stripped
+    return descriptions
+
+
+def resolve_type_hints(func: Callable) -> Dict[str, Any]:
+    """Get a function's type hints, resolving string annotations where possible"""
+    try:
+        return get_type_hints(func)
+    except Exception:
+        return {}
+
+
+def _parameters_schema(func: Callable) -> Dict:
+    """Build the JSON schema of a function's parameters from its signature and docstring"""
+    sig = inspect.signature(func)
+    hints = resolve_type_hints(func)
+    param_docs = _parse_param_docs(inspect.getdoc(func) or "")
+    schema = {"type": "object", "properties": {}, "required": []}
+
+    for name, param in sig.parameters.items():
+        if name == "self" or param.kind in (
+            inspect.Parameter.VAR_POSITIONAL,
+            inspect.Parameter.VAR_KEYWORD,
+        ):
+            continue
+
+        prop = _type_schema(hints.get(name, param.annotation))
+        prop["description"] = param_docs.get(name) or f"Parameter: {name}"
+        if param.default == inspect.Parameter.empty:
+            schema["required"].append(name)
+        elif isinstance(param.default, (str, int, float, bool)) or param.default is None:
+            prop["default"] = param.default
+        schema["properties"][name] = prop
+
+    return schema
 
 
 def create_function_schema(
     func: Callable, format: Union[str, SchemaFormat] = SchemaFormat.BASELINE
 ) -> Dict:
     """Create a function schema in the specified format"""
-    sig = inspect.signature(func)
+    if isinstance(format, str):
+        format = SchemaFormat(format)
     doc = inspect.getdoc(func) or ""
 
     if format == SchemaFormat.ANTHROPIC:
         # Create schema in Anthropic's tool format
-        schema = {
-            "name": func.__name__,
-            "description": doc,
-            "input_schema": {"type": "object", "properties": {}, "required": []},
-        }
-
-        for name, param in sig.parameters.items():
-            if name == "self":
-                continue
-
-            schema["input_schema"]["properties"][name] = {
-                "type": _get_type(param.annotation),
-                "description": f"Parameter: {name}",
-            }
-
-            if param.default == inspect.Parameter.empty:
-                schema["input_schema"]["required"].append(name)
-
-        return schema
-
-    elif format == SchemaFormat.OPENAI:
-        # Create schema in OpenAI's tool format
-        schema = {
-            "name": func.__name__,
-            "description": doc,
-            "parameters": {"type": "object", "properties": {}, "required": []},
-        }
-
-        for name, param in sig.parameters.items():
-            if name == "self":
-                continue
-
-            schema["parameters"]["properties"][name] = {
-                "type": _get_type(param.annotation),
-                "description": f"Parameter: {name}",
-            }
-
-            if param.default == inspect.Parameter.empty:
-                schema["parameters"]["required"].append(name)
-
-        return schema
-
-    else:
-        # Basic schema for other formats
-        schema = {
+        return {
             "name": func.__name__,
             "description": doc,
-            "parameters": {"type": "object", "properties": {}, "required": []},
+            "input_schema": _parameters_schema(func),
         }
 
-        for name, param in sig.parameters.items():
-            if name == "self":
-                continue
-
-            schema["parameters"]["properties"][name] = {
-                "type": _get_type(param.annotation),
-                "description": f"Parameter: {name}",
-            }
-
-            if param.default == inspect.Parameter.empty:
-                schema["parameters"]["required"].append(name)
-
-        return schema
+    # OpenAI's tool format, also used as the basic schema for other formats
+    return {
+        "name": func.__name__,
+        "description": doc,
+        "parameters": _parameters_schema(func),
+    }
@@ -0,0 +1,239 @@
+"""
+Module: validation.py
+Purpose: Validate and coerce tool call arguments from type hints before a tool runs
+"""
+
+from __future__ import annotations
+import inspect
+import json
+from typing import Any, Callable, Dict, List, Tuple, Union
+from typing_extensions import Literal, get_args, get_origin
+
+from .utils import UnionType, resolve_type_hints
+
+_TRUE = ("true", "1", "yes", "y", "on")
+_FALSE = ("false", "0", "no", "n", "off")
+_MISSING = object()
+
+
+class ArgumentError(ValueError):
+    """Raised when tool call arguments do not match the tool's signature"""
+
+    def __init__(self, func_name: str, problems: List[str]):
+        self.func_name = func_name
+        self.problems = problems
+        super().__init__(f"Invalid arguments for {func_name}: " + "; ".join(problems))
+
+
+def _coerce_str(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError("expected a string")
+
+
+def _coerce_int(value):
+    if isinstance(value, bool):
+        raise TypeError("expected an integer")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise TypeError("expected an integer")
+
+
+def _coerce_float(value):
+    if isinstance(value, bool):
+        raise TypeError("expected a number")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    raise TypeError("expected a number")
+
+
+def _coerce_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+    raise TypeError("expected a boolean")
+
+
+def _type_name(annotation: Any) -> str:
+    if annotation is type(None):
+        return "null"
+    return getattr(annotation, "__name__", None) or str(annotation).replace("typing.", "")
+
+
+def _passthrough(value):
+    return value
+
+
+def _from_json(value, expected: type):
+    """Accept JSON-encoded containers, which models often send as strings"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    if not isinstance(value, expected):
+        raise TypeError(f"expected {'an array' if expected is list else 'an object'}")
+    return value
+
+
+_PRIMITIVE_COERCERS = {
+    str: _coerce_str,
+    int: _coerce_int,
+    float: _coerce_float,
+    bool: _coerce_bool,
+}
+
+
+def compile_coercer(annotation: Any) -> Callable[[Any], Any]:
+    """Build a function that checks a value against a type hint and coerces it"""
+    if annotation in (inspect.Parameter.empty, Any):
+        return _passthrough
+    if annotation in _PRIMITIVE_COERCERS:
+        return _PRIMITIVE_COERCERS[annotation]
+    if annotation is type(None):
+
+        def coerce_none(value):
+            if value is None:
+                return None
+            raise TypeError("expected null")
+
+        return coerce_none
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+
+    if origin is Literal:
+        allowed = list(args)
+
+        def coerce_literal(value):
+            for option in allowed:
+                if value == option or (isinstance(value, str) and str(option) == value.strip()):
+                    return option
+            raise TypeError(f"expected one of {allowed}")
+
+        return coerce_literal
+
+    if origin in (Union, UnionType):
+        members = list(args)
+        coercers = [(member, compile_coercer(member)) for member in members]
+        optional = type(None) in members
+
+        def coerce_union(value):
+            if value is None and optional:
+                return None
+            # Keep values that already have one of the member types
+            for member, coerce in coercers:
+                if isinstance(member, type) and type(value) is member:
+                    return value
+            for member, coerce in coercers:
+                try:
+                    return coerce(value)
+                except (TypeError, ValueError):
+                    continue
+            raise TypeError("expected " + " or ".join(_type_name(m) for m in members))
+
+        return coerce_union
+
+    if origin is tuple and args and not (len(args) == 2 and args[1] is Ellipsis):
+        # Fixed-length tuple such as Tuple[int, str]: one coercer per position
+        positions = [] if args == ((),) else [compile_coercer(arg) for arg in args]
+
+        def coerce_tuple(value):
+            elements = _from_json(value, list)
+            if len(elements) != len(positions):
+                raise TypeError(f"expected an array of {len(positions)} items")
+            return tuple(coerce(element) for coerce, element in zip(positions, elements))
+
+        return coerce_tuple
+
+    if origin in (list, tuple, set, frozenset) or annotation in (list, tuple):
+        item = compile_coercer(args[0]) if args else _passthrough
+        container = origin or annotation
+
+        def coerce_list(value):
+            items = [item(element) for element in _from_json(value, list)]
+            return items if container is list else container(items)
+
+        return coerce_list
+
+    if origin is dict or annotation is dict:
+        value_coercer = compile_coercer(args[1]) if len(args) == 2 else _passthrough
+
+        def coerce_dict(value):
+            return {key: value_coercer(item) for key, item in _from_json(value, dict).items()}
+
+        return coerce_dict
+
+    return _passthrough
+
+
+class ToolValidator:
+    """Checks and coerces the arguments of one tool, compiled once from its signature.
+
+    Omitted arguments are filled in with their defaults, so calls that only
+    differ in spelling out a default produce the same arguments.
+    """
+
+    def __init__(self, func: Callable):
+        self.func_name = func.__name__
+        sig = inspect.signature(func)
+        hints = resolve_type_hints(func)
+        self.accepts_kwargs = False
+        self.parameters: Dict[str, Tuple[Callable[[Any], Any], Any]] = {}
+        for name, param in sig.parameters.items():
+            if name == "self" or param.kind == inspect.Parameter.VAR_POSITIONAL:
+                continue
+            if param.kind == inspect.Parameter.VAR_KEYWORD:
+                self.accepts_kwargs = True
+                continue
+            default = _MISSING if param.default == inspect.Parameter.empty else param.default
+            self.parameters[name] = (compile_coercer(hints.get(name, param.annotation)), default)
+
+    def __call__(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return coerced arguments or raise ArgumentError listing every problem"""
+        params = params or {}
+        problems = []
+        coerced = {}
+        for name, (coerce, default) in self.parameters.items():
+            if name not in params:
+                if default is _MISSING:
+                    problems.append(f"missing required argument '{name}'")
+                else:
+                    coerced[name] = default
+                continue
+            try:
+                coerced[name] = coerce(params[name])
+            except (TypeError, ValueError) as e:
+                problems.append(f"'{name}' {e}, got {params[name]!r}")
+
+        for name in params:
+            if name not in self.parameters:
+                if self.accepts_kwargs:
+                    coerced[name] = params[name]
+                else:
+                    problems.append(f"unknown argument '{name}'")
+
+        if problems:
+            raise ArgumentError(self.func_name, problems)
+        return coerced
@@ -0,0 +1,48 @@
+"""Scripted agents and call builders shared by the tests"""
+
+import time
+from typing import Dict
+
+from smart_team.agents.base_agent import BaseAgent
+from smart_team.types import AgentResponse
+
+
+class ScriptedAgent(BaseAgent):
+    """Agent that plays back scripted responses instead of calling a model.
+
+    Script entries that are exceptions are raised, and once the script is
+    used up the agent answers "done" without calling anything.
+    """
+
+    def _init_client(self, **kwargs):
+        self.script = list(kwargs.get("script", []))
+        self.delay = kwargs.get("delay", 0)
+        self.requests = 0
+
+    def send_message(self, messages):
+        self.requests += 1
+        time.sleep(self.delay)
+        if not self.script:
+            return AgentResponse(text="done", function_calls=[])
+        response = self.script.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def call(name: str, **parameters) -> Dict:
+    return {"name": name, "parameters": parameters}
+
+
+def respond(*calls: Dict, text: str = "") -> AgentResponse:
+    return AgentResponse(text=text, function_calls=list(calls))
+
+
+def transfer_to(agents: Dict[str, BaseAgent], name: str):
+    """Transfer function to agents[name], looked up when it is called"""
+
+    def transfer(task: str):
+        return agents[name]
+
+    transfer.__name__ = f"transfer_to_{name.lower()}"
+    return transfer
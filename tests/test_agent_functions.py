@@ -0,0 +1,89 @@
+import pytest
+
+from smart_team import artifacts
+from smart_team.agents import agent_functions
+from smart_team.agents.agent_functions import load_artifact, search_and_fetch_content, set_search_backend
+from smart_team.artifacts import ArtifactStore
+from smart_team.search import Page, SearchBackend
+
+
+class StaticBackend(SearchBackend):
+    """Returns the first num_results of a fixed list of pages, skipping excluded URLs"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def search(self, query, num_results, exclude=(), **kwargs):
+        self.requests.append((num_results, set(exclude)))
+        return [page for page in self.pages if page.url not in exclude][:num_results]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path))
+    monkeypatch.setattr(artifacts, "_default_store", store)
+    yield store
+
+
+@pytest.fixture
+def backend():
+    previous = agent_functions._search_backend
+
+    def use(pages):
+        static = StaticBackend(pages)
+        set_search_backend(static)
+        return static
+
+    yield use
+    set_search_backend(previous)
+
+
+def long_page(i, words=400):
+    return Page(url=f"https://example.com/{i}", content=" ".join(f"page{i}word{n}" for n in range(words)))
+
+
+def test_normal_search_result_stays_inline(store, backend):
+    backend([long_page(i) for i in range(5)])
+    result = search_and_fetch_content("query")
+
+    for i in range(5):
+        assert f"URL: https://example.com/{i}" in result
+        # The first 200 words of every page are in the result itself
+        assert f"page{i}word199" in result
+        assert f"page{i}word200" not in result
+    assert result.count("artifact://") == 5
+
+
+def test_truncated_page_can_be_read_from_its_artifact(store, backend):
+    backend([long_page(0)])
+    result = search_and_fetch_content("query", num_results=1)
+    handle = result.split("stored as ")[1].split(";")[0]
+
+    assert "page0word399" in load_artifact(handle, offset=0, max_chars=100_000)
+    assert "more characters" in load_artifact(handle, max_chars=10)
+
+
+def test_short_pages_are_not_stored(store, backend):
+    backend([Page(url="https://example.com/short", content="A short page.")])
+    result = search_and_fetch_content("query", num_results=1)
+
+    assert "artifact://" not in result
+    assert store.total_bytes() == 0
+
+
+def test_pages_with_only_repeated_paragraphs_are_backfilled(store, backend):
+    original = "Cookie notice.\nThe real article text about elections."
+    static = backend(
+        [
+            Page(url="https://news.example/a", content=original),
+            Page(url="https://mirror.example/a", content="The real article text about elections.\nCookie notice."),
+            Page(url="https://other.example/b", content="Cookie notice.\nA different article on turnout."),
+        ]
+    )
+    result = search_and_fetch_content("elections", num_results=2)
+
+    assert "https://mirror.example/a" not in result
+    assert "URL: https://other.example/b\nContent:\nA different article on turnout." in result
+    assert result.count("URL: ") == 2
+    assert static.requests[1] == (1, {"https://news.example/a", "https://mirror.example/a"})
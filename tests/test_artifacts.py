@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+import pytest
+
+from smart_team.artifacts import ArtifactStore, parse_handle
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = store.put("print('hello')", suffix=".py")
+    second = store.put("print('hello')", suffix=".py")
+
+    assert first.handle == second.handle
+    assert first.handle.startswith("artifact://")
+    assert store.get_text(first.handle) == "print('hello')"
+    assert store.total_bytes() == len("print('hello')")
+
+
+def test_parse_handle_rejects_paths():
+    with pytest.raises(ValueError):
+        parse_handle("artifact://../../etc/passwd")
+    store_handle = "artifact://" + "0" * 64
+    assert parse_handle(store_handle) == "0" * 64
+
+
+def test_unknown_handle_raises_key_error(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    with pytest.raises(KeyError):
+        store.get("artifact://" + "0" * 64)
+    assert not store.exists("not a handle")
+
+
+def test_least_recently_used_artifacts_are_evicted(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=250)
+    old = store.put("a" * 100)
+    time.sleep(0.02)
+    used = store.put("b" * 100)
+    time.sleep(0.02)
+    # Reading an artifact makes it recently used
+    store.get(old.handle)
+    time.sleep(0.02)
+    new = store.put("c" * 100)
+
+    assert store.exists(old.handle)
+    assert not store.exists(used.handle)
+    assert store.exists(new.handle)
+    assert store.total_bytes() == store._total == 200
+
+
+def test_store_larger_than_quota_keeps_the_new_artifact(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=50)
+    artifact = store.put("x" * 100)
+    assert store.exists(artifact.handle)
+
+
+def test_running_total_survives_reopen(tmp_path):
+    ArtifactStore(str(tmp_path)).put("x" * 120)
+    store = ArtifactStore(str(tmp_path), max_bytes=200)
+    store.put("y" * 120)
+    assert store.total_bytes() == 120
+
+
+def test_concurrent_writes_are_safe(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    errors = []
+    handles = []
+
+    def write(worker):
+        try:
+            for i in range(20):
+                handles.append(store.put(f"shared {i}").handle)
+                handles.append(store.put(f"worker {worker} item {i}").handle)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(handles)) == 20 + 8 * 20
+    assert all(store.exists(handle) for handle in handles)
+    assert store._total == store.total_bytes()
+    leftovers = [name for _, _, files in os.walk(tmp_path) for name in files if name.startswith(".tmp-")]
+    assert leftovers == []
@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from helpers import ScriptedAgent, call, respond
+
+from smart_team.agents.cascade_agent import CASCADE_ESCALATIONS, CASCADE_REQUESTS, CascadeAgent
+from smart_team.types import AgentResponse
+
+
+def get_weather(city: str) -> str:
+    return f"Sunny in {city}"
+
+
+def tier(name, *script, model=None):
+    agent = ScriptedAgent(name, "i", [get_weather], script=list(script))
+    agent.model = model or name
+    return agent
+
+
+def cascade(name, *tiers, **kwargs):
+    return CascadeAgent(name, "i", [get_weather], tiers=list(tiers), **kwargs)
+
+
+def test_first_acceptable_answer_is_returned():
+    small, large = tier("small", respond(text="hi")), tier("large")
+    agent = cascade("CascadeFirst", small, large)
+
+    assert agent.send_message([]).text == "hi"
+    assert large.requests == 0
+    assert agent.escalation_rate() == 0.0
+    assert CASCADE_REQUESTS.get(agent="CascadeFirst", model="small") == 1
+
+
+@pytest.mark.parametrize(
+    "response, reason",
+    [
+        (respond(text="Error: connection refused"), "error"),
+        (respond(text="  "), "empty_answer"),
+        (respond(call("get_forecast", city="Oslo")), "unknown_function"),
+        (respond(call("get_weather", town="Oslo")), "invalid_arguments"),
+        (AgentResponse(text="", function_calls=[{"name": "get_weather"}]), "malformed_tool_call"),
+    ],
+)
+def test_rejected_answers_escalate(response, reason):
+    name = f"CascadeReject-{reason}"
+    agent = cascade(name, tier("small", response), tier("large", respond(call("get_weather", city="Oslo"))))
+
+    assert agent.send_message([]).function_calls == [call("get_weather", city="Oslo")]
+    assert agent.escalations == {reason: 1}
+    assert agent.tier_counts == {1: 1}
+    assert CASCADE_ESCALATIONS.get(agent=name, model="small", reason=reason) == 1
+    assert CASCADE_REQUESTS.get(agent=name, model="large") == 1
+
+
+def test_checks_run_in_order():
+    seen = []
+
+    def first(agent, response):
+        seen.append("first")
+        return "first_failed"
+
+    def second(agent, response):
+        seen.append("second")
+        return None
+
+    agent = cascade("CascadeOrder", tier("small", respond(text="hi")), tier("large"), checks=[first, second])
+    agent.send_message([])
+
+    assert seen == ["first"]
+    assert agent.escalations == {"first_failed": 1}
+
+
+def test_escalates_when_a_tier_raises():
+    agent = cascade("CascadeRaise", tier("small", RuntimeError("timeout")), tier("large", respond(text="ok")))
+
+    assert agent.send_message([]).text == "ok"
+    assert agent.escalations == {"exception": 1}
+    assert CASCADE_ESCALATIONS.get(agent="CascadeRaise", model="small", reason="exception") == 1
+
+
+def test_last_tier_always_answers():
+    agent = cascade("CascadeLast", tier("small", respond(text="")), tier("large", respond(text="")))
+    assert agent.send_message([]).text == ""
+    assert agent.tier_counts == {1: 1}
+
+    failing = cascade("CascadeLastRaise", tier("small", respond(text="")), tier("large", RuntimeError("down")))
+    with pytest.raises(RuntimeError):
+        failing.send_message([])
+
+
+def test_escalation_rate():
+    small = tier("small", respond(text="a"), respond(text=""), respond(text="b"), respond(text=""))
+    agent = cascade("CascadeRate", small, tier("large"))
+    for _ in range(4):
+        agent.send_message([])
+
+    assert agent.requests == 4
+    assert agent.escalation_rate() == 0.5
+
+
+def test_concurrent_sessions_share_counts():
+    agent = cascade("CascadeThreads", tier("small"), tier("large"))
+
+    def send():
+        for _ in range(200):
+            agent.send_message([])
+
+    threads = [threading.Thread(target=send) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert agent.requests == 1600
+    assert agent.tier_counts == {0: 1600}
@@ -0,0 +1,35 @@
+import os
+import threading
+
+from smart_team.executors import PROCESS, SUBPROCESS, THREAD, ToolRuntime, execution_backend, get_backend, is_parallel_safe
+
+
+def test_backends_run_where_declared():
+    runtime = ToolRuntime(max_threads=2, max_processes=1)
+    try:
+        assert runtime.call(os.getpid, backend=PROCESS) != os.getpid()
+        assert runtime.call(os.getpid, backend=SUBPROCESS) != os.getpid()
+        assert runtime.call(threading.get_ident, backend=THREAD) != threading.get_ident()
+        assert runtime.call(threading.get_ident) == threading.get_ident()
+        # Workers are not forked from this threaded process
+        assert runtime._processes._mp_context.get_start_method() != "fork"
+    finally:
+        runtime.shutdown()
+
+
+def test_tools_are_not_parallel_safe_unless_declared():
+    @execution_backend("thread")
+    def install(package: str):
+        pass
+
+    @execution_backend("thread", parallel_safe=True)
+    def search(query: str):
+        pass
+
+    def plain():
+        pass
+
+    assert get_backend(install) == THREAD
+    assert not is_parallel_safe(install)
+    assert is_parallel_safe(search)
+    assert not is_parallel_safe(plain)
@@ -0,0 +1,205 @@
+import threading
+import time
+
+import pytest
+
+from helpers import ScriptedAgent, call, respond, transfer_to
+
+from smart_team.executors import ToolRuntime, execution_backend
+from smart_team.graph import AgentGraph, GraphSession, SessionBudget
+from smart_team.singleflight import SingleFlight
+
+
+@pytest.fixture
+def runtime():
+    runtime = ToolRuntime(max_threads=8)
+    yield runtime
+    runtime.shutdown()
+
+
+def make_session(agents, runtime, **kwargs):
+    # A private SingleFlight keeps tests from coalescing with each other
+    return GraphSession(AgentGraph(agents), verbose=False, flight=SingleFlight(), runtime=runtime, **kwargs)
+
+
+def test_hop_budget_stops_ping_pong(runtime):
+    agents = {}
+    agents["A"] = ScriptedAgent(
+        "A", "i", [transfer_to(agents, "B")], is_orchestrator=True,
+        script=[respond(call("transfer_to_b", task=str(i))) for i in range(10)],
+    )
+    agents["B"] = ScriptedAgent(
+        "B", "i", [transfer_to(agents, "A")],
+        script=[respond(call("transfer_to_a", task=str(i))) for i in range(10)],
+    )
+    session = make_session(list(agents.values()), runtime, budget=SessionBudget(max_hops=3))
+
+    assert session.run("go") == "Stopped: Exceeded 3 agent transfers"
+    assert session.active_agent is agents["A"]
+
+
+def test_repeated_identical_call_is_detected(runtime):
+    calls = []
+
+    def lookup(key: str) -> str:
+        calls.append(key)
+        return "nothing"
+
+    agent = ScriptedAgent("A", "i", [lookup], script=[respond(call("lookup", key="x"))] * 5)
+    session = make_session([agent], runtime, budget=SessionBudget(max_repeats=2))
+
+    assert session.run("go").startswith("Stopped: A repeated lookup")
+    assert len(calls) == 2
+
+
+def test_tool_call_budget(runtime):
+    def lookup(key: str) -> str:
+        return key
+
+    agent = ScriptedAgent("A", "i", [lookup], script=[respond(call("lookup", key=str(i))) for i in range(5)])
+    session = make_session([agent], runtime, budget=SessionBudget(max_tool_calls=3))
+
+    assert session.run("go") == "Stopped: Exceeded 3 tool calls"
+    assert session.tool_calls == 4
+
+
+def test_calls_from_one_response_run_in_order(runtime):
+    events = []
+
+    @execution_backend("thread")
+    def install(package: str) -> str:
+        events.append("install_start")
+        time.sleep(0.1)
+        events.append("install_done")
+        return "installed"
+
+    @execution_backend("thread")
+    def run_code(code: str) -> str:
+        events.append("run_start")
+        return "ran"
+
+    agent = ScriptedAgent(
+        "A", "i", [install, run_code],
+        script=[respond(call("install", package="x"), call("run_code", code="import x"))],
+    )
+    make_session([agent], runtime).run("go")
+
+    assert events == ["install_start", "install_done", "run_start"]
+
+
+def test_parallel_safe_calls_run_concurrently(runtime):
+    running = []
+    lock = threading.Lock()
+    peak = []
+
+    @execution_backend("thread", parallel_safe=True)
+    def fetch(url: str) -> str:
+        with lock:
+            running.append(url)
+            peak.append(len(running))
+        time.sleep(0.1)
+        with lock:
+            running.remove(url)
+        return url
+
+    agent = ScriptedAgent(
+        "A", "i", [fetch],
+        script=[respond(*(call("fetch", url=str(i)) for i in range(4)))],
+    )
+    start = time.monotonic()
+    make_session([agent], runtime).run("go")
+
+    assert max(peak) == 4
+    assert time.monotonic() - start < 0.3
+
+
+def test_transfers_in_one_response_fan_out_and_return(runtime):
+    agents = {}
+    back = respond(call("transfer_to_orchestrator", task="done"))
+    agents["Orchestrator"] = ScriptedAgent(
+        "Orchestrator", "i", [transfer_to(agents, "Weather"), transfer_to(agents, "Search")],
+        is_orchestrator=True,
+        script=[
+            respond(call("transfer_to_weather", task="Paris"), call("transfer_to_search", task="news")),
+            respond(text="summary"),
+        ],
+    )
+    for name in ("Weather", "Search"):
+        agents[name] = ScriptedAgent(
+            name, "i", [transfer_to(agents, "Orchestrator")], delay=0.2, script=[back]
+        )
+    session = make_session(list(agents.values()), runtime)
+
+    start = time.monotonic()
+    assert session.run("weather and news") == "summary"
+    assert time.monotonic() - start < 0.35
+    assert session.hops == 4
+    assert session.active_agent is agents["Orchestrator"]
+
+
+def test_fan_out_shares_the_hop_budget(runtime):
+    agents = {}
+    agents["Orchestrator"] = ScriptedAgent(
+        "Orchestrator", "i", [transfer_to(agents, "Weather"), transfer_to(agents, "Search")],
+        is_orchestrator=True,
+        script=[respond(call("transfer_to_weather", task="a"), call("transfer_to_search", task="b"))],
+    )
+    for name in ("Weather", "Search"):
+        agents[name] = ScriptedAgent(
+            name, "i", [transfer_to(agents, "Orchestrator")],
+            script=[respond(call("transfer_to_orchestrator", task="back"))],
+        )
+    session = make_session(list(agents.values()), runtime, budget=SessionBudget(max_hops=3))
+
+    assert session.run("go") == "Stopped: Exceeded 3 agent transfers"
+
+
+def test_branch_transfers_to_several_agents_fan_out_again(runtime):
+    agents = {}
+    back = respond(call("transfer_to_orchestrator", task="done"))
+    agents["Orchestrator"] = ScriptedAgent(
+        "Orchestrator", "i", [transfer_to(agents, "Research"), transfer_to(agents, "Weather")],
+        is_orchestrator=True,
+        script=[
+            respond(call("transfer_to_research", task="a"), call("transfer_to_weather", task="b")),
+            respond(text="summary"),
+        ],
+    )
+    agents["Research"] = ScriptedAgent(
+        "Research", "i",
+        [transfer_to(agents, "Search"), transfer_to(agents, "Code"), transfer_to(agents, "Orchestrator")],
+        script=[respond(call("transfer_to_search", task="c"), call("transfer_to_code", task="d")), back],
+    )
+    agents["Search"] = ScriptedAgent("Search", "i", [transfer_to(agents, "Research")], script=[respond(call("transfer_to_research", task="r"))])
+    agents["Code"] = ScriptedAgent("Code", "i", [transfer_to(agents, "Research")], script=[respond(call("transfer_to_research", task="r"))])
+    agents["Weather"] = ScriptedAgent("Weather", "i", [transfer_to(agents, "Orchestrator")], script=[back])
+    session = make_session(list(agents.values()), runtime)
+
+    assert session.run("go") == "summary"
+    assert agents["Search"].requests == 1
+    assert agents["Code"].requests == 1
+    # Research continued after both of its branches returned
+    assert agents["Research"].requests == 2
+
+
+def test_transfers_next_to_a_transfer_back_are_rejected(runtime):
+    agents = {}
+    agents["Orchestrator"] = ScriptedAgent(
+        "Orchestrator", "i", [transfer_to(agents, "Weather"), transfer_to(agents, "Search")],
+        is_orchestrator=True,
+        script=[
+            respond(call("transfer_to_weather", task="a"), call("transfer_to_search", task="b")),
+            respond(text="summary"),
+        ],
+    )
+    agents["Weather"] = ScriptedAgent(
+        "Weather", "i", [transfer_to(agents, "Orchestrator"), transfer_to(agents, "Code")],
+        script=[respond(call("transfer_to_orchestrator", task="done"), call("transfer_to_code", task="x"))],
+    )
+    agents["Search"] = ScriptedAgent("Search", "i", [transfer_to(agents, "Orchestrator")], script=[respond(call("transfer_to_orchestrator", task="done"))])
+    agents["Code"] = ScriptedAgent("Code", "i", [])
+    session = make_session(list(agents.values()), runtime)
+
+    assert session.run("go") == "summary"
+    assert agents["Code"].requests == 0
+    assert any("transfer to Code not followed" in memory["content"] for memory in session.memories)
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from smart_team.http_cache import HTTPCache, freshness_lifetime
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves a few paths with different caching headers and counts requests"""
+
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers))
+        headers = {}
+        if self.path == "/fresh":
+            body, headers["Cache-Control"] = b"fresh body", "max-age=60"
+        elif self.path == "/stale":
+            body, headers["Cache-Control"] = b"stale body", "max-age=0"
+        elif self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                return
+            body, headers["ETag"], headers["Cache-Control"] = b"etag body", '"v1"', "no-cache"
+        elif self.path == "/last-modified":
+            if self.headers.get("If-Modified-Since"):
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = b"dated body"
+            headers["Last-Modified"] = formatdate(time.time() - 3600, usegmt=True)
+            headers["Cache-Control"] = "max-age=0"
+        elif self.path == "/vary":
+            agent = self.headers.get("User-Agent")
+            body = f"page for {agent}".encode("utf-8")
+            headers["Cache-Control"], headers["Vary"] = "max-age=60", "User-Agent"
+        elif self.path == "/no-date":
+            if self.headers.get("If-None-Match"):
+                # send_response_only leaves out the Date header
+                self.send_response_only(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            body, headers["ETag"], headers["Cache-Control"] = b"dated", '"v1"', "max-age=60"
+        elif self.path == "/no-store":
+            body, headers["Cache-Control"] = b"secret", "no-store"
+        else:
+            body, headers["Cache-Control"] = b"x" * 400, "max-age=60"
+
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def date_time_string(self, timestamp=None):
+        # /no-date is served as if it was generated an hour ago
+        if self.path == "/no-date":
+            return formatdate(time.time() - 3600, usegmt=True)
+        return super().date_time_string(timestamp)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clear_requests():
+    Handler.requests = []
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def requests_for(path):
+    return [headers for requested, headers in Handler.requests if requested == path]
+
+
+def test_fresh_responses_are_served_from_disk(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    first = cache.get(server + "/fresh")
+    second = cache.get(server + "/fresh")
+
+    assert (first.from_cache, second.from_cache) == (False, True)
+    assert second.text == "fresh body"
+    assert len(requests_for("/fresh")) == 1
+    # A new cache on the same directory reuses the stored response
+    assert HTTPCache(str(tmp_path)).get(server + "/fresh").from_cache
+
+
+def test_stale_responses_without_validators_are_fetched_again(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.get(server + "/stale")
+    cache.get(server + "/stale")
+
+    assert len(requests_for("/stale")) == 2
+    assert cache.stats() == {"hits": 0, "revalidated": 0, "misses": 2}
+
+
+def test_etag_is_revalidated_with_a_304(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.get(server + "/etag")
+    response = cache.get(server + "/etag")
+
+    assert response.status_code == 200
+    assert response.text == "etag body"
+    assert response.from_cache
+    assert requests_for("/etag")[1].get("If-None-Match") == '"v1"'
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_last_modified_is_revalidated(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.get(server + "/last-modified")
+    response = cache.get(server + "/last-modified")
+
+    assert response.text == "dated body"
+    assert requests_for("/last-modified")[1].get("If-Modified-Since")
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_each_varied_header_value_is_cached_separately(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    for agent in ("a", "b", "a", "b"):
+        response = cache.get(server + "/vary", headers={"User-Agent": agent})
+        assert response.text == f"page for {agent}"
+
+    assert len(requests_for("/vary")) == 2
+    assert cache.stats() == {"hits": 2, "revalidated": 0, "misses": 2}
+
+
+def test_revalidation_without_date_refreshes_the_age(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    # Stored with a Date an hour old, so max-age=60 has already run out
+    cache.get(server + "/no-date")
+    cache.get(server + "/no-date")
+    response = cache.get(server + "/no-date")
+
+    assert response.text == "dated"
+    assert len(requests_for("/no-date")) == 2
+    assert cache.stats() == {"hits": 1, "revalidated": 1, "misses": 1}
+
+
+def test_user_agent_is_stable_per_host():
+    from smart_team.search.web import USER_AGENTS, user_agent_for
+
+    assert user_agent_for("https://example.com/a") == user_agent_for("https://EXAMPLE.com/b?q=1")
+    assert user_agent_for("https://example.com/a") in USER_AGENTS
+
+
+def test_no_store_responses_are_not_stored(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.get(server + "/no-store")
+    cache.get(server + "/no-store")
+
+    assert len(requests_for("/no-store")) == 2
+    assert cache.total_bytes() == 0
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    cache = HTTPCache(str(tmp_path), max_bytes=900)
+    cache.get(server + "/big1")
+    time.sleep(0.02)
+    cache.get(server + "/big2")
+    time.sleep(0.02)
+    # Reading big1 makes big2 the least recently used entry
+    cache.get(server + "/big1")
+    time.sleep(0.02)
+    cache.get(server + "/big3")
+
+    assert cache.total_bytes() <= 900
+    assert cache.get(server + "/big1").from_cache
+    assert cache.get(server + "/big3").from_cache
+    assert not cache.get(server + "/big2").from_cache
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")]
+
+
+def test_freshness_lifetime_rules():
+    now = time.time()
+    assert freshness_lifetime({"cache-control": "public, max-age=120"}) == 120
+    assert freshness_lifetime({"Date": formatdate(now, usegmt=True), "Expires": formatdate(now + 300, usegmt=True)}) == pytest.approx(300, abs=1)
+    assert freshness_lifetime({"Date": formatdate(now, usegmt=True), "Expires": "0"}) == 0
+    # Heuristic: a tenth of the time since Last-Modified
+    assert freshness_lifetime(
+        {"Date": formatdate(now, usegmt=True), "Last-Modified": formatdate(now - 1000, usegmt=True)}
+    ) == pytest.approx(100, abs=1)
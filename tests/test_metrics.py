@@ -0,0 +1,150 @@
+import os
+import urllib.request
+from concurrent.futures import Future
+
+import pytest
+
+from helpers import ScriptedAgent, call, respond
+
+from smart_team.executors import PROCESS, ToolRuntime, execution_backend
+from smart_team.graph import AgentGraph, GraphSession
+from smart_team.metrics import (
+    TOOL_CALLS,
+    TOOL_ERRORS,
+    TOOL_IN_FLIGHT,
+    TOOL_LATENCY,
+    MetricsRegistry,
+    estimate_cost,
+    is_error_result,
+    track_llm,
+    track_tool,
+)
+from smart_team.singleflight import SingleFlight
+
+
+def test_counter_gauge_and_histogram():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls")
+    calls.inc(tool="a")
+    calls.inc(2, tool="a")
+    calls.inc(tool="b")
+    depth = registry.gauge("depth", "Depth")
+    depth.inc(3)
+    depth.dec()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, tool="a")
+
+    assert calls.get(tool="a") == 3
+    assert calls.get(tool="missing") == 0
+    assert depth.get() == 2
+    assert latency.get(tool="a") == {"count": 3, "sum": 5.55}
+    assert registry.counter("calls_total") is calls
+    with pytest.raises(ValueError):
+        registry.gauge("calls_total")
+
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls by tool").inc(tool='say "hi"')
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.5, tool="a")
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines[:3] == [
+        "# HELP calls_total Calls by tool",
+        "# TYPE calls_total counter",
+        'calls_total{tool="say \\"hi\\""} 1',
+    ]
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{tool="a",le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{tool="a",le="1.0"} 1' in lines
+    assert 'latency_seconds_bucket{tool="a",le="+Inf"} 1' in lines
+    assert 'latency_seconds_count{tool="a"} 1' in lines
+    assert 'latency_seconds_sum{tool="a"} 0.5' in lines
+
+
+def test_http_endpoint_and_snapshot(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls").inc()
+    server = registry.start_http_server(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert "calls_total 1" in response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    registry.dump(str(tmp_path / "metrics.json"))
+    snapshot = registry.snapshot()
+    assert snapshot["metrics"]["calls_total"]["series"] == [{"name": "calls_total", "labels": {}, "value": 1}]
+
+
+def test_track_llm_records_tokens_cost_and_errors():
+    with track_llm("openai", "metrics-test-agent", "gpt-4o-mini") as llm_call:
+        llm_call.usage(1_000_000, 0)
+    assert estimate_cost("gpt-4o-mini", 1_000_000, 0) == pytest.approx(0.15)
+    with pytest.raises(RuntimeError):
+        with track_llm("openai", "metrics-test-agent", "gpt-4o-mini"):
+            raise RuntimeError("rate limited")
+
+    from smart_team.metrics import LLM_COST, LLM_ERRORS, LLM_REQUESTS
+
+    labels = {"agent": "metrics-test-agent", "model": "gpt-4o-mini", "provider": "openai"}
+    assert LLM_REQUESTS.get(**labels) == 2
+    assert LLM_ERRORS.get(**labels) == 1
+    assert LLM_COST.get(**labels) == pytest.approx(0.15)
+
+
+@pytest.mark.parametrize(
+    "result, error",
+    [
+        ("Error: pip not found", True),
+        ("Unexpected error creating virtual environment: x", True),
+        ((False, "Error executing code"), True),
+        ((True, "output"), False),
+        ("Temperature in Paris: 20", False),
+        (None, False),
+    ],
+)
+def test_error_shaped_results(result, error):
+    assert is_error_result(result) is error
+
+
+def test_track_tool_counts_raised_and_returned_errors():
+    tool = "metrics_test_tool"
+    before = TOOL_ERRORS.get(tool=tool)
+    ok, returned_error, raised = Future(), Future(), Future()
+    for future in (ok, returned_error, raised):
+        track_tool(tool, lambda future=future: future)
+    assert TOOL_IN_FLIGHT.get(tool=tool) == 3
+
+    ok.set_result("fine")
+    returned_error.set_result((False, "failed"))
+    raised.set_exception(OSError("boom"))
+
+    assert TOOL_IN_FLIGHT.get(tool=tool) == 0
+    assert TOOL_CALLS.get(tool=tool) == 3
+    assert TOOL_ERRORS.get(tool=tool) == before + 2
+    assert TOOL_LATENCY.get(tool=tool)["count"] == 3
+
+
+@execution_backend(PROCESS)
+def failing_in_child(code: str) -> tuple:
+    return False, f"Error executing code in process {os.getpid()}"
+
+
+def test_session_records_metrics_of_process_tools():
+    runtime = ToolRuntime(max_processes=1)
+    agent = ScriptedAgent(
+        "CodeBot", "i", [failing_in_child], script=[respond(call("failing_in_child", code="x"))]
+    )
+    try:
+        GraphSession(AgentGraph([agent]), verbose=False, flight=SingleFlight(), runtime=runtime).run("go")
+    finally:
+        runtime.shutdown()
+
+    assert TOOL_CALLS.get(tool="failing_in_child") == 1
+    assert TOOL_ERRORS.get(tool="failing_in_child") == 1
+    assert TOOL_IN_FLIGHT.get(tool="failing_in_child") == 0
@@ -0,0 +1,112 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("ollama")
+
+from smart_team.agents.ollama_agent import OllamaAgent
+
+NS = 1_000_000_000
+
+
+class OllamaStub(BaseHTTPRequestHandler):
+    """Answers /api/generate and /api/chat like a local Ollama server"""
+
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append((self.path, body))
+        timings = {
+            "total_duration": 3 * NS,
+            "prompt_eval_count": 12,
+            "prompt_eval_duration": NS // 2,
+            "eval_count": 30,
+            "eval_duration": NS,
+        }
+        if self.path == "/api/generate":
+            payload = {"model": body["model"], "response": "", "done": True, "load_duration": 2 * NS}
+        else:
+            payload = {
+                "model": body["model"],
+                "message": {
+                    "role": "assistant",
+                    "content": "",
+                    "tool_calls": [{"function": {"name": "get_weather", "arguments": {"city": "Paris"}}}],
+                },
+                "done": True,
+                "load_duration": NS // 10,
+                **timings,
+            }
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStub)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get_weather(city: str) -> str:
+    """Get the weather.
+
+    Args:
+        city (str): The city.
+    """
+    return city
+
+
+def test_preload_and_chat_send_the_same_options(server):
+    OllamaStub.requests = []
+    agent = OllamaAgent(
+        "WeatherBot", "instructions", [get_weather],
+        model="llama3", base_url=server, num_ctx=8192, keep_alive="1h", max_parallel=2,
+    )
+    response = agent.send_message([{"role": "user", "content": "weather in Paris"}])
+
+    (preload_path, preload), (chat_path, chat) = OllamaStub.requests
+    assert (preload_path, chat_path) == ("/api/generate", "/api/chat")
+    for body in (preload, chat):
+        assert body["model"] == "llama3"
+        assert body["keep_alive"] == "1h"
+        assert body["options"]["num_ctx"] == 8192
+    assert response.function_calls == [{"name": "get_weather", "parameters": {"city": "Paris"}}]
+
+
+def test_load_and_generation_times_are_split(server):
+    agent = OllamaAgent("WeatherBot", "instructions", [get_weather], model="llama3", base_url=server)
+    assert agent.metrics["preloads"] == 1
+    assert agent.metrics["requests"] == 0
+    assert agent.metrics["load_seconds"] == 2.0
+
+    agent.send_message([{"role": "user", "content": "hi"}])
+    assert agent.last_metrics == {
+        "total_seconds": 3.0,
+        "load_seconds": 0.1,
+        "prompt_eval_seconds": 0.5,
+        "eval_seconds": 1.0,
+        "prompt_tokens": 12,
+        "eval_tokens": 30,
+    }
+    assert agent.metrics["requests"] == 1
+    assert agent.metrics["load_seconds"] == pytest.approx(2.1)
+    assert agent.metrics["eval_tokens"] == 30
+
+
+def test_preload_can_be_skipped(server):
+    OllamaStub.requests = []
+    OllamaAgent("WeatherBot", "instructions", model="llama3", base_url=server, preload=False)
+    assert OllamaStub.requests == []
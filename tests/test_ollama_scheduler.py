@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("ollama")
+
+from smart_team.agents.ollama_agent import OllamaScheduler
+
+
+def _wait_for_queue(scheduler, depth, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.queue_depth() < depth:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"queue never reached {depth} waiting requests")
+        time.sleep(0.005)
+
+
+def test_waiting_requests_start_by_priority_then_arrival():
+    scheduler = OllamaScheduler(max_parallel=1)
+    order = []
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot():
+            release.wait()
+
+    def request(label, priority):
+        with scheduler.slot(priority):
+            order.append(label)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while scheduler.active < 1:
+        time.sleep(0.005)
+
+    threads = []
+    for depth, (label, priority) in enumerate(
+        [("low", 5), ("high-1", 0), ("mid", 2), ("high-2", 0)], start=1
+    ):
+        thread = threading.Thread(target=request, args=(label, priority))
+        thread.start()
+        threads.append(thread)
+        _wait_for_queue(scheduler, depth)
+
+    release.set()
+    for thread in [holder] + threads:
+        thread.join(timeout=2)
+
+    assert order == ["high-1", "high-2", "mid", "low"]
+    assert scheduler.queue_depth() == 0
+    assert scheduler.active == 0
+
+
+@pytest.mark.parametrize("max_parallel", [1, 3])
+def test_active_requests_never_exceed_max_parallel(max_parallel):
+    scheduler = OllamaScheduler(max_parallel=max_parallel)
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def request():
+        nonlocal running, peak
+        with scheduler.slot():
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert peak == max_parallel
+    assert scheduler.active == 0
+
+
+def test_slot_is_released_when_the_request_fails():
+    scheduler = OllamaScheduler(max_parallel=1)
+    with pytest.raises(RuntimeError):
+        with scheduler.slot():
+            raise RuntimeError("request failed")
+    assert scheduler.active == 0
+
+    with scheduler.slot():
+        assert scheduler.active == 1
+
+
+def test_for_host_shares_one_scheduler_per_host():
+    first = OllamaScheduler.for_host("http://scheduler-test:11434", max_parallel=2)
+    second = OllamaScheduler.for_host("http://scheduler-test:11434")
+    other = OllamaScheduler.for_host("http://scheduler-test-2:11434", max_parallel=1)
+
+    assert first is second
+    assert first.max_parallel == 2
+    assert other is not first
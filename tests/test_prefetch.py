@@ -0,0 +1,86 @@
+import threading
+import time
+
+from helpers import ScriptedAgent, call, respond, transfer_to
+
+from smart_team.executors import ToolRuntime, execution_backend
+from smart_team.graph import AgentGraph, GraphSession
+from smart_team.prefetch import Prefetcher, speculative, tool_key
+from smart_team.singleflight import SingleFlight
+from smart_team.validation import ToolValidator
+
+
+def make_team(calls, weather_script):
+    @speculative(lambda task: {"city": task})
+    @execution_backend("thread", parallel_safe=True)
+    def get_weather(city: str, units: str = "C") -> str:
+        calls.append(city)
+        time.sleep(0.1)
+        return f"20{units} in {city}"
+
+    agents = {}
+    agents["Orchestrator"] = ScriptedAgent(
+        "Orchestrator", "i", [transfer_to(agents, "Weather")], is_orchestrator=True,
+        script=[respond(call("transfer_to_weather", task="Paris")), respond(text="summary")],
+    )
+    agents["Weather"] = ScriptedAgent(
+        "Weather", "i", [get_weather, transfer_to(agents, "Orchestrator")], delay=0.1,
+        script=weather_script + [respond(call("transfer_to_orchestrator", task="done"))],
+    )
+    return list(agents.values())
+
+
+def test_prefetch_is_used_when_the_agent_makes_the_predicted_call():
+    calls = []
+    agents = make_team(calls, [respond(call("get_weather", city="Paris", units="C"))])
+    session = GraphSession(AgentGraph(agents), verbose=False, flight=SingleFlight(), prefetch=True)
+
+    assert session.run("weather in Paris") == "summary"
+    assert calls == ["Paris"]
+    assert session.prefetcher.stats() == {"started": 1, "hits": 1, "wasted": 0, "hit_rate": 1.0}
+
+
+def test_unused_prefetch_is_counted_as_wasted():
+    calls = []
+    agents = make_team(calls, [respond(call("get_weather", city="Paris, France"))])
+    session = GraphSession(AgentGraph(agents), verbose=False, flight=SingleFlight(), prefetch=True)
+
+    session.run("weather in Paris")
+    assert sorted(calls) == ["Paris", "Paris, France"]
+    assert session.prefetcher.stats()["wasted"] == 1
+
+
+def test_prefetch_is_off_by_default():
+    calls = []
+    agents = make_team(calls, [respond(call("get_weather", city="Paris"))])
+    session = GraphSession(AgentGraph(agents), verbose=False, flight=SingleFlight())
+
+    session.run("weather in Paris")
+    assert session.prefetcher is None
+    assert calls == ["Paris"]
+
+
+def test_speculative_call_joins_an_identical_call_in_flight():
+    runs = []
+    release = threading.Event()
+
+    @speculative(lambda task: {"query": task})
+    def search(query: str) -> str:
+        runs.append(query)
+        release.wait(2)
+        return "results"
+
+    runtime = ToolRuntime(max_threads=4)
+    flight = SingleFlight()
+    try:
+        key = tool_key("search", {"query": "news"})
+        real = flight.submit(key, lambda: runtime.submit(search, backend="thread", query="news"))
+        prefetcher = Prefetcher(runtime, flight)
+        prefetcher.start("Search", {"search": search}, {"search": ToolValidator(search)}, "news")
+        release.set()
+
+        assert prefetcher.take(key).result(timeout=2) == real.result(timeout=2) == "results"
+        assert runs == ["news"]
+        assert flight.stats()["coalesced"] == 1
+    finally:
+        runtime.shutdown()
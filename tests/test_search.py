@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+
+from smart_team.search import (
+    BM25Index,
+    LocalIndexBackend,
+    Page,
+    SearchBackend,
+    TieredSearchBackend,
+    remove_repeated_paragraphs,
+)
+
+PAGES = {
+    "https://a.example/python": "Python is a programming language with dynamic typing.",
+    "https://b.example/snakes": "Pythons are large snakes found in Africa and Asia.",
+    "https://c.example/rust": "Rust is a systems programming language focused on safety.",
+}
+
+
+def make_index(path=None):
+    index = BM25Index(path=path)
+    for url, content in PAGES.items():
+        index.add(url, content)
+    return index
+
+
+class FakeWebBackend(SearchBackend):
+    """Fallback that serves generated pages and records its queries"""
+
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, num_results, exclude=(), dedup=None, **kwargs):
+        self.queries.append((query, num_results))
+        pages = []
+        for i in range(num_results):
+            page = Page(url=f"https://web.example/{len(self.queries)}/{i}", content=f"{query} result number {i} " * 5)
+            if page.url in exclude or (dedup is not None and not dedup.accept(page)):
+                continue
+            pages.append(page)
+        return pages
+
+
+def test_bm25_ranks_matching_documents_with_coverage():
+    index = make_index()
+    results = index.search("programming language safety")
+
+    assert results[0][0] == "https://c.example/rust"
+    assert results[0][2] == 1.0
+    assert {url for url, _, _ in results} == {"https://a.example/python", "https://c.example/rust"}
+    assert index.search("the and of") == []
+
+
+def test_adding_a_url_again_replaces_it_and_remove_drops_it():
+    index = make_index()
+    index.add("https://c.example/rust", "Rust is a metal oxide")
+    assert index.search("programming safety", limit=5)[0][0] != "https://c.example/rust"
+    assert index.search("oxide")[0][0] == "https://c.example/rust"
+
+    index.remove("https://c.example/rust")
+    assert "https://c.example/rust" not in index
+    assert index.search("oxide") == []
+    assert index.total_length == sum(doc["length"] for doc in index.documents.values())
+
+
+def test_journal_persists_adds_and_removes(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = make_index(path)
+    index.remove("https://b.example/snakes")
+    index.close()
+    # A line torn by a crash is ignored
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://torn.example", "cont')
+
+    reloaded = BM25Index(path=path)
+    assert set(reloaded.documents) == {"https://a.example/python", "https://c.example/rust"}
+    assert reloaded.search("rust")[0][0] == "https://c.example/rust"
+
+
+def test_outdated_journal_is_compacted(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = BM25Index(path=path)
+    for i in range(300):
+        index.add("https://a.example/page", f"version {i}")
+
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) < 150
+    assert BM25Index(path=path).get("https://a.example/page")["content"] == "version 299"
+
+
+def test_concurrent_adds_and_saves_do_not_fail(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = BM25Index(path=path)
+    errors = []
+
+    def work(worker):
+        try:
+            for i in range(20):
+                index.add(f"https://w{worker}.example/{i}", f"page {i} from worker {worker}")
+            index.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(BM25Index(path=path)) == 160
+    assert [p.name for p in tmp_path.iterdir()] == ["index.jsonl"]
+
+
+def test_local_backend_filters_low_coverage_and_stale_pages():
+    index = make_index()
+    index.add("https://old.example/rust", "Rust systems safety guide", fetched_at=time.time() - 30 * 24 * 3600)
+    backend = LocalIndexBackend(index, min_coverage=0.6)
+
+    urls = [page.url for page in backend.search("rust systems safety", 5)]
+    assert urls == ["https://c.example/rust"]
+    assert backend.search("rust cargo crates registry", 5) == []
+
+
+def test_tiered_search_answers_locally_when_the_index_suffices():
+    web = FakeWebBackend()
+    backend = TieredSearchBackend(LocalIndexBackend(make_index()), web)
+
+    pages = backend.search("rust systems safety", 1)
+    assert [page.source for page in pages] == ["local"]
+    assert web.queries == []
+    assert backend.local_hits == 1
+
+
+def test_tiered_search_falls_back_and_indexes_fetched_pages(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    web = FakeWebBackend()
+    backend = TieredSearchBackend(LocalIndexBackend(make_index(path)), web)
+
+    pages = backend.search("rust systems safety", 3)
+    assert [page.source for page in pages] == ["local", "web", "web"]
+    assert web.queries == [("rust systems safety", 2)]
+    assert backend.fallbacks == 1
+
+    # The fetched pages were persisted and now answer the query offline
+    offline = TieredSearchBackend(LocalIndexBackend(BM25Index(path=path)), None)
+    assert len(offline.search("rust systems safety result", 3)) == 3
+
+
+def test_tiered_search_skips_near_duplicates():
+    index = BM25Index()
+    text = "Breaking news about the local election results and turnout figures today " * 3
+    index.add("https://news.example/a", text)
+    index.add("https://mirror.example/a", text + " Share this article")
+    index.add("https://other.example/b", "Election turnout figures analysis by region and age group today")
+    backend = TieredSearchBackend(LocalIndexBackend(index, min_coverage=0.5), None)
+
+    urls = [page.url for page in backend.search("election turnout figures", 3)]
+    assert len(urls) == 2
+    assert "https://other.example/b" in urls
+    assert backend.duplicates_dropped == 1
+
+
+def test_repeated_paragraphs_are_removed_across_batches():
+    assert remove_repeated_paragraphs(["Accept cookies\nFirst story", "ACCEPT cookies!\nSecond story\n\nFirst story"]) == [
+        "Accept cookies\nFirst story",
+        "Second story",
+    ]
+    seen = set()
+    remove_repeated_paragraphs(["Subscribe now\nStory one"], seen)
+    assert remove_repeated_paragraphs(["Subscribe now"], seen) == [""]
+
+
+def test_tiered_search_respects_excluded_urls():
+    web = FakeWebBackend()
+    backend = TieredSearchBackend(LocalIndexBackend(make_index()), web)
+
+    pages = backend.search("rust systems safety", 1, exclude={"https://c.example/rust"})
+    assert [page.source for page in pages] == ["web"]
+    assert all(page.url != "https://c.example/rust" for page in pages)
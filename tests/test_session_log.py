@@ -0,0 +1,126 @@
+from helpers import ScriptedAgent, call, respond
+
+from smart_team.graph import AgentGraph, GraphSession
+from smart_team.session_log import SessionLog
+
+
+def make_weather_tool(calls):
+    def get_weather(city: str) -> str:
+        calls.append(city)
+        return f"temp {len(calls)} in {city}"
+
+    return get_weather
+
+
+def test_logged_results_are_not_reused_by_a_later_request(tmp_path):
+    calls = []
+    agent = ScriptedAgent(
+        "WeatherBot",
+        "instructions",
+        [make_weather_tool(calls)],
+        script=[
+            respond(call("get_weather", city="London")),
+            respond(text="first"),
+            respond(call("get_weather", city="London")),
+            respond(text="second"),
+        ],
+    )
+    with SessionLog(str(tmp_path / "session.log")) as log:
+        session = GraphSession(AgentGraph([agent]), verbose=False, log=log)
+        assert session.run("weather in London") == "first"
+        assert session.run("weather in London") == "second"
+
+    assert calls == ["London", "London"]
+    assert any("temp 2 in London" in memory["content"] for memory in log.memories)
+
+
+def test_unfinished_request_is_resumed_from_the_log(tmp_path):
+    path = str(tmp_path / "session.log")
+    calls = []
+    get_weather = make_weather_tool(calls)
+
+    crashing = ScriptedAgent(
+        "WeatherBot",
+        "instructions",
+        [get_weather],
+        script=[respond(call("get_weather", city="London")), RuntimeError("crash")],
+    )
+    log = SessionLog(path)
+    session = GraphSession(AgentGraph([crashing]), verbose=False, log=log)
+    try:
+        session.run("weather in London")
+    except RuntimeError:
+        pass
+    log.close()
+
+    restarted = ScriptedAgent(
+        "WeatherBot", "instructions", [get_weather], script=[respond(text="sunny")]
+    )
+    with SessionLog(path) as log:
+        session = GraphSession(AgentGraph([restarted]), verbose=False, log=log)
+        assert session.run("weather in London") == "sunny"
+
+    # The first LLM response and the tool result were replayed from the log
+    assert calls == ["London"]
+    assert restarted.requests == 1
+    assert [m["content"] for m in log.memories if m["role"] == "user"] == ["weather in London"]
+    assert log.results == {}
+
+
+def test_torn_record_is_dropped_on_reopen(tmp_path):
+    path = str(tmp_path / "session.log")
+    with SessionLog(path) as log:
+        log.append_memory({"role": "user", "content": "hello"})
+    with open(path, "ab") as f:
+        f.write(b"\x00\x00\x01\x00partial")
+
+    with SessionLog(path) as log:
+        assert log.memories == [{"role": "user", "content": "hello"}]
+        log.append_memory({"role": "assistant", "content": "hi"})
+
+    with SessionLog(path) as log:
+        assert [m["content"] for m in log.memories] == ["hello", "hi"]
+
+
+def test_snapshot_restores_state(tmp_path):
+    path = str(tmp_path / "session.log")
+    with SessionLog(path, snapshot_every=3) as log:
+        for i in range(7):
+            log.append_memory({"role": "user", "content": str(i)})
+        log.set_active_agent("SearchBot")
+
+    with SessionLog(path, snapshot_every=3) as log:
+        assert [m["content"] for m in log.memories] == [str(i) for i in range(7)]
+        assert log.active_agent == "SearchBot"
+
+
+def test_snapshot_of_a_deleted_log_is_ignored(tmp_path):
+    path = tmp_path / "session.log"
+    with SessionLog(str(path), snapshot_every=10) as log:
+        for i in range(25):
+            log.append_memory({"role": "user", "content": str(i)})
+    path.unlink()
+
+    with SessionLog(str(path), snapshot_every=10) as log:
+        log.append_memory({"role": "user", "content": "new"})
+    size = path.stat().st_size
+
+    with SessionLog(str(path), snapshot_every=10) as log:
+        assert [m["content"] for m in log.memories] == ["new"]
+    assert path.stat().st_size == size
+
+
+def test_snapshot_beyond_the_end_of_the_log_is_ignored(tmp_path):
+    path = tmp_path / "session.log"
+    with SessionLog(str(path), snapshot_every=10) as log:
+        for i in range(25):
+            log.append_memory({"role": "user", "content": str(i)})
+    snapshot = (tmp_path / "session.log.snap").read_bytes()
+    path.unlink()
+    with SessionLog(str(path)) as log:
+        log.append_memory({"role": "user", "content": "new"})
+    # A stale snapshot copied back next to the new log
+    (tmp_path / "session.log.snap").write_bytes(snapshot)
+
+    with SessionLog(str(path)) as log:
+        assert [m["content"] for m in log.memories] == ["new"]
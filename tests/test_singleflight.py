@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from smart_team.singleflight import SingleFlight, make_key
+
+
+def test_make_key_ignores_argument_order():
+    assert make_key("tool", {"a": 1, "b": 2}) == make_key("tool", {"b": 2, "a": 1})
+    assert make_key("tool", {"a": 1}) != make_key("tool", {"a": 2})
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(2)
+        return "result"
+
+    with ThreadPoolExecutor(5) as pool:
+        leader = pool.submit(flight.do, "key", slow)
+        started.wait(2)
+        followers = [pool.submit(flight.do, "key", slow) for _ in range(4)]
+        while flight.stats()["coalesced"] < 4:
+            time.sleep(0.005)
+        assert flight.in_flight() == 1
+        release.set()
+        results = [leader.result(2)] + [f.result(2) for f in followers]
+
+    assert results == ["result"] * 5
+    assert runs == [1]
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_key_is_released_after_the_call():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats()["calls"] == 2
+
+
+def test_leader_exception_reaches_followers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(2)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait(2)
+        follower = pool.submit(flight.do, "key", failing)
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.005)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="boom"):
+                future.result(2)
+    assert flight.in_flight() == 0
+
+
+def test_do_async_coalesces_tasks():
+    flight = SingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "page"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["page"] * 5
+    assert runs == [1]
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_task_followers_wait_on_a_thread_leader():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(2)
+        return "shared"
+
+    async def followers():
+        tasks = [asyncio.create_task(flight.do_async("key", blocking)) for _ in range(3)]
+        while flight.stats()["coalesced"] < 3:
+            await asyncio.sleep(0.005)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    leader = threading.Thread(target=flight.do, args=("key", blocking))
+    leader.start()
+    started.wait(2)
+    assert asyncio.run(followers()) == ["shared"] * 3
+    leader.join(2)
+    assert flight.stats()["calls"] == 1
+
+
+def test_submit_starts_once_and_propagates_errors():
+    flight = SingleFlight()
+    inner = Future()
+    starts = []
+
+    def start():
+        starts.append(1)
+        return inner
+
+    first = flight.submit("key", start)
+    second = flight.submit("key", start)
+    assert starts == [1]
+    inner.set_result(42)
+    assert first.result(1) == second.result(1) == 42
+
+    failed = Future()
+    future = flight.submit("other", lambda: failed)
+    failed.set_exception(RuntimeError("tool failed"))
+    with pytest.raises(RuntimeError, match="tool failed"):
+        future.result(1)
+
+    def broken_start():
+        raise OSError("could not start")
+
+    with pytest.raises(OSError):
+        flight.submit("third", broken_start).result(1)
+    assert flight.in_flight() == 0
+
+
+def test_wrap_coalesces_by_arguments():
+    flight = SingleFlight()
+    calls = []
+
+    @flight.wrap
+    def double(x):
+        calls.append(x)
+        return x * 2
+
+    assert double(2) == 4
+    assert double.__name__ == "double"
+    assert calls == [2]
@@ -0,0 +1,48 @@
+from typing import Dict, List, Literal, Optional, Tuple
+
+import pytest
+
+from smart_team.utils import _type_schema
+from smart_team.validation import ArgumentError, ToolValidator
+
+
+def plot(point: Tuple[int, str], values: Tuple[float, ...] = (), tags: Optional[List[str]] = None, mode: Literal["a", "b"] = "a") -> str:
+    return ""
+
+
+def test_fixed_length_tuples_are_checked_per_position():
+    assert _type_schema(Tuple[int, str]) == {
+        "type": "array",
+        "prefixItems": [{"type": "integer"}, {"type": "string"}],
+        "items": False,
+        "minItems": 2,
+        "maxItems": 2,
+    }
+    assert _type_schema(Tuple[float, ...]) == {"type": "array", "items": {"type": "number"}}
+
+    validator = ToolValidator(plot)
+    assert validator({"point": [1, "z"], "values": ["1.5", 2]}) == {
+        "point": (1, "z"),
+        "values": (1.5, 2.0),
+        "tags": None,
+        "mode": "a",
+    }
+    with pytest.raises(ArgumentError, match="expected an array of 2 items"):
+        validator({"point": [1, "z", 3]})
+    with pytest.raises(ArgumentError, match="'point'"):
+        validator({"point": ["x", "z"]})
+
+
+def test_validator_coerces_json_strings_and_reports_every_problem():
+    def tool(count: int, options: Dict[str, int], flag: bool = False):
+        pass
+
+    validator = ToolValidator(tool)
+    assert validator({"count": "3", "options": '{"a": "1"}', "flag": "yes"}) == {
+        "count": 3,
+        "options": {"a": 1},
+        "flag": True,
+    }
+    with pytest.raises(ArgumentError) as error:
+        validator({"options": [], "extra": 1})
+    assert len(error.value.problems) == 3